@@ -0,0 +1,128 @@
+import sys
+import json
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterator, List
+
+from redaction import RedactionVault
+
+DEFAULT_CONCURRENCY = 8
+
+
+def read_queries(path: str) -> Iterator[Dict[str, Any]]:
+    """Queries of a JSONL file: {"id": ..., "query": "..."} objects or bare JSON strings.
+
+    Blank lines are skipped; the line number is used when a record has no id.
+    A line that is not valid JSON or has no string query is yielded as
+    {"id", "error"} instead, so one bad line doesn't stop the batch.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": line_number, "error": f"Invalid JSON on line {line_number}: {e}"}
+                continue
+            if isinstance(record, str):
+                record = {"query": record}
+            if not isinstance(record, dict) or not isinstance(record.get("query"), str):
+                record_id = record.get("id", line_number) if isinstance(record, dict) else line_number
+                yield {"id": record_id, "error": f"Line {line_number} has no \"query\" string"}
+                continue
+            record.setdefault("id", line_number)
+            yield record
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))]
+
+
+async def run_batch(process_query: Callable[[str, RedactionVault], Awaitable[str]], input_path: str,
+                    output_path: str, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """Run every query of a JSONL file through ``process_query``, ``concurrency`` at a time.
+
+    Each conversation gets its own RedactionVault. Results are appended to
+    ``output_path`` as JSONL in completion order as soon as each one
+    finishes, so a long run can be followed (and survives a crash) while
+    it is in progress. Progress is reported on stderr.
+
+    Input lines that can't be read are written as {"id", "error"} records
+    and counted as errors.
+
+    Returns:
+        Summary with query/error counts, wall time, throughput and p50/p95 latency
+    """
+    # Bounded so a file of thousands of queries is never loaded at once
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies: List[float] = []
+    errors = 0
+    done = 0
+    start = time.perf_counter()
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        async def worker() -> None:
+            nonlocal errors, done
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                if "error" in item:
+                    record = {"id": item["id"], "error": item["error"]}
+                    errors += 1
+                else:
+                    query_start = time.perf_counter()
+                    try:
+                        record = {"id": item["id"], "query": item["query"]}
+                        record["response"] = await process_query(item["query"], RedactionVault())
+                    except Exception as e:
+                        record = {"id": item.get("id"), "query": item.get("query"), "error": f"{type(e).__name__}: {e}"}
+                        errors += 1
+                    latency = time.perf_counter() - query_start
+                    latencies.append(latency)
+                    record["latency_ms"] = round(latency * 1e3, 1)
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                done += 1
+                if done % 100 == 0:
+                    print(f"batch: {done} queries done", file=sys.stderr)
+
+        async def put(item: Any) -> None:
+            # A worker that died (e.g. a failed write) fails the batch instead of leaving the queue full forever
+            pending = asyncio.ensure_future(queue.put(item))
+            while not pending.done():
+                alive = [task for task in workers if not task.done()]
+                failed = [task for task in workers if task.done() and (task.cancelled() or task.exception())]
+                if failed or not alive:
+                    pending.cancel()
+                    if failed and not failed[0].cancelled():
+                        raise failed[0].exception()
+                    raise RuntimeError("Batch workers stopped before the input was consumed")
+                await asyncio.wait([pending, *alive], return_when=asyncio.FIRST_COMPLETED)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for item in read_queries(input_path):
+                await put(item)
+            for _ in workers:
+                await put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "queries": done,
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_qps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1e3, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1e3, 1),
+    }
@@ -0,0 +1,99 @@
+"""How quickly a cancelled query stops, and how much of its work is abandoned.
+
+Drives ``MCPClient.process_query`` from mcp_client_ui.py against the local
+stub OpenAI server and a stdio MCP server with a slow ``wait`` tool, and
+cancels each query part-way as the window's Cancel button does. For every
+scenario it prints how long the query took to wind down after the cancel,
+how many stream chunks the stub still produced afterwards (none once the
+client closes its stream) against those it never had to generate, how
+many tool runs the server saw cancelled, and the client's AbortedWork.
+
+usage (from the project root): python -m benchmarks.bench_cancel
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from qasync import QEventLoop
+
+from benchmarks.stub_openai_server import StubOpenAIServer
+from cancellation import track_requests
+from llm_client import create_openai_client
+from mcp_client_ui import MCPClient
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocking_tool_server.py")
+# Roughly 50 tokens/sec of decoding
+TOKEN_DELAY = 0.02
+ANSWER_TOKENS = 500
+TOOL_MS = 5000
+CANCEL_AFTER = 1.0
+ANSWER = " ".join(f"word{i}" for i in range(ANSWER_TOKENS))
+WAIT_CALL = [{"id": "call_wait", "function": {"name": "wait", "arguments": json.dumps({"ms": TOOL_MS})}}]
+SCENARIOS = {
+    "streamed answer": ("1", [{"content": ANSWER}]),
+    "non-streamed answer": ("0", [{"content": ANSWER}]),
+    f"{TOOL_MS} ms tool call": ("1", [{"tool_calls": WAIT_CALL}, {"content": ANSWER}]),
+}
+
+
+async def wait_stats(session) -> dict:
+    return json.loads((await session.call_tool("wait_stats", {})).content[0].text)
+
+
+async def measure(client: MCPClient, stub: StubOpenAIServer, session) -> tuple:
+    before = await wait_stats(session)
+    query = asyncio.ensure_future(client.process_query("Show my tickets"))
+    await asyncio.sleep(CANCEL_AFTER)
+    sent = stub.chunks_sent
+    start = time.perf_counter()
+    query.cancel()
+    try:
+        await query
+    except asyncio.CancelledError:
+        pass
+    wind_down = time.perf_counter() - start
+    # Give the stub and the server time to notice the client went away
+    await asyncio.sleep(0.5)
+    after = await wait_stats(session)
+    return wind_down, stub.chunks_sent - sent, after["cancelled"] - before["cancelled"]
+
+
+async def main():
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[SERVER])
+    async with stdio_client(params) as (read, write), ClientSession(read, write) as session:
+        await session.initialize()
+        track_requests(session)
+        print(f"{'scenario':>22} {'wind-down (ms)':>15} {'chunks after cancel':>20} {'chunks never made':>18} {'tool runs cancelled':>20}")
+        for label, (stream, script) in SCENARIOS.items():
+            os.environ["OPENAI_STREAM"] = stream
+            stub = StubOpenAIServer(token_delay=TOKEN_DELAY, script=script)
+            base_url = await stub.start()
+            client = MCPClient(auth_token="bench")
+            client.session = session
+            client.client = create_openai_client(api_key="stub").with_options(base_url=base_url)
+            await client.tool_catalog.refresh()
+            wind_down, late, cancelled = await measure(client, stub, session)
+            # Chunks a streamed answer would have taken: role, tokens, finish and usage
+            never = ANSWER_TOKENS + 3 - stub.chunks_sent if stream == "1" and "answer" in label else 0
+            print(f"{label:>22} {wind_down * 1e3:>15.1f} {late:>20} {never:>18} {cancelled:>20}")
+            print(f"{'':>22} AbortedWork: {client.aborted.summary()}")
+            await client.client.close()
+            await stub.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s")
+    app = QApplication([])
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main())
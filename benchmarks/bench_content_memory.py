@@ -0,0 +1,83 @@
+"""Peak-memory benchmark for structural redaction of MCP tool results.
+
+Measures with tracemalloc how much memory redacting a large Jira-style
+result list allocates: the previous always-copying traversal versus the
+copy-avoiding traversal in ``redaction.py`` (copying and in-place), for a
+payload without PII and one where every ticket carries an address.
+
+usage (from the project root): python -m benchmarks.bench_content_memory
+"""
+import json
+import tracemalloc
+from typing import Any
+
+import redaction
+
+TICKETS = 20_000
+
+
+class TextContent:
+    """Stand-in for mcp.types.TextContent so the benchmark runs without mcp installed"""
+
+    def __init__(self, type: str, text: str, annotations: Any = None, meta: Any = None):
+        self.type = type
+        self.text = text
+        self.annotations = annotations
+        self.meta = meta
+
+
+def legacy_redact_content(content: Any, vault: redaction.RedactionVault) -> Any:
+    if hasattr(content, 'text') and hasattr(content, 'type'):
+        return type(content)(
+            type=content.type,
+            text=redaction.redact_emails_in_text(content.text, vault),
+            annotations=getattr(content, 'annotations', None),
+            meta=getattr(content, 'meta', None)
+        )
+    elif isinstance(content, list):
+        return [legacy_redact_content(item, vault) for item in content]
+    elif isinstance(content, dict):
+        return {k: legacy_redact_content(v, vault) for k, v in content.items()}
+    elif isinstance(content, str):
+        return redaction.redact_emails_in_text(content, vault)
+    return content
+
+
+def build_result(with_pii: bool) -> list:
+    assignee = "satish.k@test.com" if with_pii else "unassigned"
+    tickets = [{
+        "ticket_id": f"PROJ-2024-{i:05d}",
+        "summary": "Update customer database schema for GDPR compliance",
+        "description": "Database contains PII that needs protection",
+        "assignee": assignee,
+        "labels": ["gdpr", "database"],
+        "priority": "MEDIUM",
+        "status": "OPEN",
+    } for i in range(TICKETS)]
+    return [TextContent(type="text", text=json.dumps(tickets[:50])), {"result": tickets}]
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak / 1024
+
+
+def main():
+    print(f"{'payload':>10} {'legacy copy (KiB)':>18} {'shared copy (KiB)':>18} {'in place (KiB)':>15}")
+    for label, with_pii in (("no PII", False), ("with PII", True)):
+        vault = redaction.RedactionVault()
+        # Payloads are built before tracing starts so only the traversal is counted
+        content = build_result(with_pii)
+        legacy = peak_kib(lambda: legacy_redact_content(content, vault))
+        shared = peak_kib(lambda: redaction.redact_emails_in_content(content, vault))
+        owned = build_result(with_pii)
+        in_place = peak_kib(lambda: redaction.redact_emails_in_content(owned, vault, in_place=True))
+        print(f"{label:>10} {legacy:>18.1f} {shared:>18.1f} {in_place:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
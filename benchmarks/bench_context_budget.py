@@ -0,0 +1,53 @@
+"""Prompt tokens re-sent over a multi-step tool chain, with and without a budget.
+
+Simulates the ``process_query`` tool loop: every step appends an assistant
+tool call and a large tool output, then the whole message list goes to the
+LLM again. Counts the estimated prompt tokens of every LLM call and the time
+spent compacting, unbounded vs ``ConversationContext`` with the default budget.
+
+usage (from the project root): python -m benchmarks.bench_context_budget
+"""
+import json
+import time
+
+from mcp.types import TextContent
+
+from conversation_context import ConversationContext
+
+STEPS = (2, 4, 8)
+OUTPUT_CHARS = 40_000
+
+
+def tool_output(step: int) -> list:
+    tickets = [{"id": f"JIRA-{step}-{i}", "title": f"Ticket {i}", "status": "OPEN"} for i in range(OUTPUT_CHARS // 60)]
+    return [TextContent(type="text", text=json.dumps(tickets))]
+
+
+def run(steps: int, token_budget: int) -> tuple:
+    context = ConversationContext([{"role": "user", "content": "show my tickets and summarize them"}],
+                                  token_budget=token_budget)
+    sent = context.total_tokens
+    compact_time = 0.0
+    for step in range(steps):
+        context.messages.append({"role": "assistant", "content": "", "tool_calls": [
+            {"id": f"call_{step}", "type": "function",
+             "function": {"name": "get_tickets_assigned_to_user", "arguments": '{"user_email": "EAMIL_1a2b3c4d"}'}}]})
+        context.messages.append({"role": "tool", "name": "get_tickets_assigned_to_user",
+                                 "content": tool_output(step), "tool_call_id": f"call_{step}"})
+        start = time.perf_counter()
+        context.compact()
+        compact_time += time.perf_counter() - start
+        sent += context.total_tokens
+    return sent, context.total_tokens, compact_time
+
+
+def main():
+    print(f"{'steps':>5} {'mode':>10} {'total prompt tokens':>20} {'last prompt':>12} {'compact (ms)':>13}")
+    for steps in STEPS:
+        for label, budget in (("unbounded", 0), ("budgeted", None)):
+            sent, last, compact_time = run(steps, budget)
+            print(f"{steps:>5} {label:>10} {sent:>20,} {last:>12,} {compact_time * 1e3:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Event loop lag of the Qt clients' CPU-bound steps, inline vs CpuOffload.
+
+Runs the steps the UIs perform on large payloads (redacting a tool result,
+rendering an answer to HTML, decoding large tool arguments) on a qasync
+loop, as the chat window does, while a 16 ms heartbeat stands in for the
+window's frames. Prints how late the heartbeat ran and the wall time of
+each step, with the steps inline on the loop and offloaded to worker
+threads (UI_CPU_OFFLOAD=1). A LoopLagMonitor reports the stalls it sees.
+
+usage (from the project root): python -m benchmarks.bench_loop_lag
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+from qasync import QEventLoop
+
+from benchmarks.bench_markdown import build_answer
+from benchmarks.bench_pii_scanner import build_payload
+from loop_guard import CpuOffload, LoopLagMonitor
+from markdown_html import MarkdownRenderer
+from redaction import RedactionVault, redact_emails_in_content
+
+FRAME = 0.016
+PAYLOAD_BYTES = 5_000_000
+
+
+async def heartbeat(lags: list) -> None:
+    while True:
+        due = time.perf_counter() + FRAME
+        await asyncio.sleep(FRAME)
+        lags.append(time.perf_counter() - due)
+
+
+async def measure(step, offload: CpuOffload) -> tuple:
+    lags = []
+    beat = asyncio.create_task(heartbeat(lags))
+    await asyncio.sleep(0.1)
+    del lags[:]
+    start = time.perf_counter()
+    await step(offload)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.05)
+    beat.cancel()
+    ms = sorted(lag * 1e3 for lag in lags) or [0.0]
+    return elapsed, statistics.median(ms), ms[-1]
+
+
+async def main():
+    payload = build_payload(PAYLOAD_BYTES)
+    answer = build_answer(1_000_000)
+    arguments = json.dumps({"tickets": json.loads(payload[:payload.rindex("}") + 1] + "]")})
+
+    async def redact(offload: CpuOffload) -> None:
+        await offload.run(redact_emails_in_content, [{"type": "text", "text": payload}], RedactionVault())
+
+    async def render(offload: CpuOffload) -> None:
+        await offload.run(MarkdownRenderer().render, answer)
+
+    async def decode(offload: CpuOffload) -> None:
+        await offload.run(json.loads, arguments)
+
+    monitor = LoopLagMonitor(threshold=0.1)
+    monitor.start()
+    print(f"{'step':>34} {'offload':>8} {'wall (ms)':>10} {'p50 lag (ms)':>13} {'max lag (ms)':>13}")
+    for label, step in ((f"redact {PAYLOAD_BYTES // 1_000_000} MB tool result", redact),
+                        ("render 1 MB answer", render),
+                        (f"decode {len(arguments) // 1_000_000} MB tool arguments", decode)):
+        for enabled in (False, True):
+            offload = CpuOffload(enabled=enabled)
+            elapsed, p50, worst = await measure(step, offload)
+            offload.shutdown()
+            print(f"{label:>34} {'on' if enabled else 'off':>8} {elapsed * 1e3:>10.0f} {p50:>13.1f} {worst:>13.1f}")
+    monitor.stop()
+    print(f"LoopLagMonitor: {monitor.stats()}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s")
+    app = QApplication([])
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main())
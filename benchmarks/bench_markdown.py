@@ -0,0 +1,87 @@
+"""Benchmark for rendering LLM answers to transcript HTML.
+
+Compares the chat window's former ``markdown_to_html`` (five ``re.sub``
+calls plus a Python loop over the lines) with ``MarkdownRenderer``: an
+uncached ``convert``, a first ``render`` (conversion plus hashing the text
+for the cache) and a repeated ``render`` served from the LRU cache, on
+answers of ticket bullets, numbered steps and paragraphs from 10 KB to
+1 MB. Also checks that both produce the same HTML.
+
+usage (from the project root): python -m benchmarks.bench_markdown
+"""
+import re
+import statistics
+import time
+
+from markdown_html import MarkdownRenderer
+
+ANSWER_SIZES = [10_000, 100_000, 1_000_000]
+REPEATS = 10
+
+
+def legacy_markdown_to_html(text: str) -> str:
+    if not text:
+        return text
+    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    text = re.sub(r'^• (.+)$', r'• \1', text, flags=re.MULTILINE)
+    text = re.sub(r'^(\d+\.\s+.+)$', r'\1', text, flags=re.MULTILINE)
+    text = re.sub(r'^- (.+)$', r'• \1', text, flags=re.MULTILINE)
+    lines = text.split('\n')
+    html_lines = []
+    for line in lines:
+        if line.strip():
+            html_lines.append(line)
+        else:
+            html_lines.append('')
+    result = '<br>'.join(html_lines)
+    result = re.sub(r'(<br>){3,}', '<br><br>', result)
+    return result
+
+
+def build_answer(size: int) -> str:
+    lines = []
+    length = 0
+    i = 0
+    while length < size:
+        if i % 12 == 0:
+            line = f"**Project {i // 12}** has the following open tickets assigned to the team this sprint:"
+        elif i % 12 == 11:
+            line = ""
+        elif i % 4 == 0:
+            line = f"{i % 9 + 1}. Reproduce the failure with build {i} and attach the logs"
+        else:
+            line = f"- **JIRA-{i}** Investigate intermittent failures of the nightly build on agent {i % 40}"
+        lines.append(line)
+        length += len(line) + 1
+        i += 1
+    return "\n".join(lines)
+
+
+def timed(fn, text: str) -> float:
+    """Median seconds of REPEATS calls"""
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(text)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    print(f"{'answer':>8} {'legacy (ms)':>12} {'convert (ms)':>13} {'1st render (ms)':>16} {'cached (ms)':>12} {'speedup':>8}")
+    for size in ANSWER_SIZES:
+        text = build_answer(size)
+        renderer = MarkdownRenderer()
+        assert renderer.convert(text) == legacy_markdown_to_html(text)
+        legacy = timed(legacy_markdown_to_html, text)
+        convert = timed(renderer.convert, text)
+        start = time.perf_counter()
+        renderer.render(text)
+        first = time.perf_counter() - start
+        cached = timed(renderer.render, text)
+        print(f"{size // 1000:>6}KB {legacy * 1e3:>12.2f} {convert * 1e3:>13.2f} {first * 1e3:>16.2f} "
+              f"{cached * 1e3:>12.3f} {legacy / convert:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Latency comparison: a fresh AsyncOpenAI per query vs one pooled client.
+
+Runs sequential chat completions against the local stub server, which
+delays every new connection to stand in for the TCP/TLS handshake of a real
+provider. The pooled client comes from ``llm_client.create_openai_client``
+and is warmed up first, as ``MCPClient.connect_to_server`` does.
+
+usage (from the project root): python -m benchmarks.bench_openai_pool
+"""
+import asyncio
+import statistics
+import time
+
+from openai import AsyncOpenAI
+
+from benchmarks.stub_openai_server import StubOpenAIServer
+from llm_client import create_openai_client, warm_up
+
+QUERIES = 50
+# Rough cost of TCP + TLS setup to a remote API endpoint
+CONNECT_DELAY = 0.05
+MESSAGES = [{"role": "user", "content": "show jira tickets for user 1234"}]
+
+
+async def complete(client: AsyncOpenAI) -> None:
+    await client.chat.completions.create(model="gpt-4-turbo", max_tokens=1000, messages=MESSAGES)
+
+
+async def fresh_client_per_query(base_url: str) -> list:
+    latencies = []
+    for _ in range(QUERIES):
+        start = time.perf_counter()
+        client = AsyncOpenAI(api_key="stub", base_url=base_url)
+        await complete(client)
+        latencies.append(time.perf_counter() - start)
+        await client.close()
+    return latencies
+
+
+async def pooled_client(base_url: str) -> list:
+    client = create_openai_client(api_key="stub")
+    client = client.with_options(base_url=base_url)
+    await warm_up(client)
+    latencies = []
+    for _ in range(QUERIES):
+        start = time.perf_counter()
+        await complete(client)
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+    return latencies
+
+
+def report(label: str, latencies: list, connections: int) -> None:
+    ms = sorted(l * 1e3 for l in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{label:>22} {ms[0]:>9.1f} {latencies[0] * 1e3:>11.1f} {statistics.median(ms):>9.1f} {p95:>9.1f} {connections:>12}")
+
+
+async def main():
+    print(f"{'':>22} {'min (ms)':>9} {'first (ms)':>11} {'p50 (ms)':>9} {'p95 (ms)':>9} {'connections':>12}")
+    for label, run in (("fresh client per query", fresh_client_per_query), ("pooled + warmed client", pooled_client)):
+        server = StubOpenAIServer(connect_delay=CONNECT_DELAY)
+        base_url = await server.start()
+        latencies = await run(base_url)
+        await server.stop()
+        report(label, latencies, server.connections)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
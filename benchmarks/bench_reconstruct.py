@@ -0,0 +1,56 @@
+"""Microbenchmark for email token reconstruction.
+
+Compares the previous per-token ``str.replace`` loop with the single-pass
+regex reconstruction in ``redaction.py`` as the redaction cache grows.
+
+usage (from the project root): python -m benchmarks.bench_reconstruct
+"""
+import timeit
+
+import redaction
+
+CACHE_SIZES = [10, 100, 1_000, 10_000, 100_000]
+# A typical LLM answer mentioning a handful of redacted addresses
+EMAILS_IN_TEXT = 5
+FILLER = "Here are the jira tickets you asked for, grouped by priority. " * 20
+
+
+def legacy_reconstruct(cache: dict, text: str) -> str:
+    for token, email in cache.items():
+        text = text.replace(token, email)
+    return text
+
+
+def fill_cache(size: int):
+    cache = {}
+    vault = redaction.RedactionVault(max_entries=size, max_bytes=2**40, ttl_seconds=None)
+    for i in range(size):
+        email = f"user{i}@test.com"
+        token = redaction.generate_redaction_token(email)
+        cache[token] = email
+        vault.put(token, email)
+    return cache, vault
+
+
+def build_text(tokens) -> str:
+    tokens = list(tokens)
+    step = max(1, len(tokens) // EMAILS_IN_TEXT)
+    picked = tokens[::step][:EMAILS_IN_TEXT]
+    return FILLER + " ".join(f"assignee {token}" for token in picked)
+
+
+def main():
+    print(f"{'cached tokens':>14} {'legacy (us)':>14} {'single-pass (us)':>18} {'speedup':>9}")
+    for size in CACHE_SIZES:
+        cache, vault = fill_cache(size)
+        text = build_text(cache)
+        assert legacy_reconstruct(cache, text) == redaction.reconstruct_emails_in_text(text, vault)
+
+        number = max(1, 20_000 // size)
+        legacy = min(timeit.repeat(lambda: legacy_reconstruct(cache, text), number=number, repeat=3)) / number
+        single = min(timeit.repeat(lambda: redaction.reconstruct_emails_in_text(text, vault), number=number, repeat=3)) / number
+        print(f"{size:>14} {legacy * 1e6:>14.1f} {single * 1e6:>18.1f} {legacy / single:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""process_query throughput and client overhead, replayed offline.
+
+Records a batch of queries once against the local stub OpenAI server and a
+real mcp_server.py (one tool round trip per query), then replays the
+recording with no network and no server: first with zero latency, which
+leaves only the client's own per-query overhead (redaction, context
+handling, tool cache, JSON), then with synthetic LLM and tool latencies at
+increasing batch concurrency.
+
+usage (from the project root): python -m benchmarks.bench_replay
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+from benchmarks.stub_openai_server import StubOpenAIServer
+from batch import run_batch
+from mcp_client import MCPClient
+from replay import Cassette
+
+QUERIES = 200
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LATENCIES = {"REPLAY_LLM_LATENCY": "0.2", "REPLAY_TOOL_LATENCY": "0.05"}
+
+
+def script(i: int) -> list:
+    call = {"id": f"call_{i}", "function": {"name": "get_email_id_from_user_id",
+                                            "arguments": json.dumps({"user_id": f"user{i}"})}}
+    return [{"tool_calls": [call]}, {"content": f"The email of user{i} is in the tool result."}]
+
+
+async def record(workdir: str) -> tuple:
+    queries = os.path.join(workdir, "queries.jsonl")
+    with open(queries, "w") as f:
+        for i in range(QUERIES):
+            f.write(json.dumps({"id": i, "query": f"what is the email id of user{i}?"}) + "\n")
+    # One query at a time so the stub's scripted tool call and answer stay paired
+    server = StubOpenAIServer(script=[step for i in range(QUERIES) for step in script(i)])
+    os.environ.update(OPENAI_BASE_URL=await server.start(), OPENAI_API_KEY="stub", OPENAI_WARMUP="0")
+    cassette = os.path.join(workdir, "cassette.jsonl")
+    client = MCPClient()
+    client.recording = Cassette.for_recording(cassette)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.connect_to_server(os.path.join(ROOT, "mcp_server.py"))
+            summary = await run_batch(client.process_query, queries, os.path.join(workdir, "recorded.jsonl"), 1)
+    finally:
+        await client.cleanup()
+        await server.stop()
+    return queries, cassette, summary
+
+
+async def replay(queries: str, cassette_path: str, concurrency: int) -> dict:
+    client = MCPClient()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cassette = await client.connect_to_replay(cassette_path)
+        summary = await run_batch(client.process_query, queries, os.devnull, concurrency)
+    summary["cassette_misses"] = cassette.misses
+    return summary
+
+
+def row(label: str, concurrency: int, summary: dict) -> None:
+    print(f"{label:>26} {concurrency:>11} {summary['throughput_qps']:>10.1f} {summary['p50_ms']:>9.1f} "
+          f"{summary['p95_ms']:>9.1f} {summary.get('cassette_misses', 0):>7}")
+
+
+async def main():
+    workdir = tempfile.mkdtemp()
+    queries, cassette, recorded = await record(workdir)
+    print(f"recorded {QUERIES} queries (LLM -> tool -> LLM) to {cassette}")
+    print(f"{'':>26} {'concurrency':>11} {'q/s':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'misses':>7}")
+    row("live (stub + server)", 1, recorded)
+    for name in LATENCIES:
+        os.environ[name] = "0"
+    for concurrency in (1, 8):
+        row("replay, no latency", concurrency, await replay(queries, cassette, concurrency))
+    os.environ.update(LATENCIES)
+    label = f"replay, {float(LATENCIES['REPLAY_LLM_LATENCY']) * 1e3:.0f}/{float(LATENCIES['REPLAY_TOOL_LATENCY']) * 1e3:.0f} ms"
+    for concurrency in (8, 32):
+        row(label, concurrency, await replay(queries, cassette, concurrency))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
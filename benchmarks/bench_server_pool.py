@@ -0,0 +1,61 @@
+"""Concurrent blocking tool calls over one stdio server vs a StdioServerPool.
+
+Fires CALLS concurrent calls of a tool that blocks its server for
+``BLOCK_MS`` and measures wall time for pools of 1, 2 and 4 processes, then
+kills one worker and shows the health check respawning it. ``spin`` (pure
+CPU) only scales up to the number of cores available.
+
+usage (from the project root): python -m benchmarks.bench_server_pool
+"""
+import asyncio
+import os
+import signal
+import sys
+import time
+
+from mcp import StdioServerParameters
+
+from server_pool import StdioServerPool
+
+CALLS = 32
+BLOCK_MS = 50
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocking_tool_server.py")
+PARAMS = StdioServerParameters(command=sys.executable, args=[SERVER])
+
+
+async def run(pool: StdioServerPool, tool: str) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(pool.call_tool(tool, {"ms": BLOCK_MS}) for _ in range(CALLS)))
+    return time.perf_counter() - start
+
+
+async def respawn_demo() -> None:
+    pool = StdioServerPool(PARAMS, size=2, health_check_interval=0, ping_timeout=1.0)
+    await pool.start()
+    victim = pool.workers[0]
+    pid = int((await victim.session.call_tool("pid", {})).content[0].text)
+    os.kill(pid, signal.SIGKILL)
+    await asyncio.sleep(0.2)
+    start = time.perf_counter()
+    await pool.health_check()
+    print(f"killed worker pid {pid}; health check respawned it in {(time.perf_counter() - start) * 1e3:.0f} ms: {pool.stats()}")
+    await run(pool, "block")
+    print(f"calls after respawn: {pool.stats()['calls']}")
+    await pool.aclose()
+
+
+async def main():
+    print(f"{CALLS} concurrent calls, {BLOCK_MS} ms each")
+    print(f"{'processes':>9} {'block (ms)':>11} {'spin (ms)':>10}")
+    for size in (1, 2, 4):
+        pool = StdioServerPool(PARAMS, size=size, health_check_interval=0)
+        await pool.start()
+        block = await run(pool, "block")
+        spin = await run(pool, "spin")
+        await pool.aclose()
+        print(f"{size:>9} {block * 1e3:>11.0f} {spin * 1e3:>10.0f}")
+    await respawn_demo()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
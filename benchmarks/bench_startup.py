@@ -0,0 +1,71 @@
+"""Client start time: spawning the stdio server vs attaching to server_daemon.py.
+
+Each run opens a fresh session (connect, initialize, list_tools), the work
+mcp_client.py does before it can answer a query. The daemon is started once
+up front; its own start time is reported separately.
+
+usage (from the project root): python -m benchmarks.bench_startup [server_script]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from server_daemon import unix_socket_client
+
+RUNS = 10
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def open_session(transport) -> float:
+    start = time.perf_counter()
+    async with transport as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - start
+
+
+async def start_daemon(script: str, socket_path: str) -> asyncio.subprocess.Process:
+    start = time.perf_counter()
+    daemon = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(ROOT, "server_daemon.py"), script, "--socket", socket_path,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    while not os.path.exists(socket_path):
+        await asyncio.sleep(0.01)
+    print(f"daemon ready in {(time.perf_counter() - start) * 1e3:.0f} ms (paid once)")
+    return daemon
+
+
+def report(label: str, times: list) -> None:
+    times = [t * 1e3 for t in times]
+    print(f"{label:>8} {statistics.median(times):>10.1f} {min(times):>9.1f} {max(times):>9.1f}")
+
+
+async def main(script: str):
+    params = StdioServerParameters(command=sys.executable, args=[script])
+    with open(os.devnull, "w") as devnull:
+        spawned = [await open_session(stdio_client(params, errlog=devnull)) for _ in range(RUNS)]
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "mcp_bench.sock")
+    daemon = await start_daemon(script, socket_path)
+    try:
+        attached = [await open_session(unix_socket_client(socket_path)) for _ in range(RUNS)]
+    finally:
+        daemon.terminate()
+        await daemon.wait()
+
+    print(f"{RUNS} session starts of {os.path.basename(script)}")
+    print(f"{'mode':>8} {'p50 (ms)':>10} {'min (ms)':>9} {'max (ms)':>9}")
+    report("spawned", spawned)
+    report("daemon", attached)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "mcp_server.py")))
@@ -0,0 +1,100 @@
+"""Qt thread time spent rendering a streamed answer: per token vs coalesced.
+
+Streams a ~10 KB Markdown answer into a TranscriptView that already holds
+a few hundred messages, as 4-character tokens arriving every
+``TOKEN_INTERVAL`` seconds. Three ways of rendering them:
+
+- per token, whole message: what the chat window did before, every token
+  re-renders and re-lays out the whole message being streamed
+- per token, incremental: TRANSCRIPT_FLUSH_MS=0, every token only renders
+  its line into the laid out message
+- coalesced, incremental: the default, tokens are buffered and rendered at
+  most every TRANSCRIPT_FLUSH_MS
+
+Only the time the Qt thread is busy (delivering tokens, processing events
+and painting) is counted, not the time waiting for the next token. Runs
+offscreen unless QT_QPA_PLATFORM is set.
+
+usage (from the project root): python -m benchmarks.bench_stream_render
+"""
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication
+
+from mcp_client_ui import markdown_to_html
+from transcript_view import DEFAULT_FLUSH_INTERVAL_MS, MessageRole, TranscriptView, message_html, plain_html
+
+HISTORY = 300
+TOKEN_INTERVAL = 0.002
+ANSWER = "\n".join(f"- **JIRA-{i}** Investigate intermittent failures of the nightly build on agent {i}" for i in range(120))
+TOKENS = [ANSWER[i:i + 4] for i in range(0, len(ANSWER), 4)]
+
+
+def format_message(role: str, text: str) -> str:
+    return message_html(role, markdown_to_html(text) if role == "assistant" else text)
+
+
+def legacy_delta(view: TranscriptView, text: str) -> None:
+    """Former append_delta: the streamed message is rendered and laid out again from scratch"""
+    model = view.transcript
+    if not model.streaming:
+        model.start_stream(text, message_html("assistant", plain_html(text)), "")
+    else:
+        row = model.rows[-1]
+        model.extend_stream(text, message_html("assistant", plain_html(row["text"] + text)), "")
+    view._changed(model.index(model.rowCount() - 1))
+
+
+def run(app: QApplication, flush_interval: int, deliver) -> tuple:
+    view = TranscriptView(format_message, markdown_to_html, flush_interval=flush_interval)
+    view.resize(800, 600)
+    view.show()
+    for i in range(HISTORY):
+        view.append("user" if i % 2 == 0 else "assistant", f"message {i}")
+    app.processEvents()
+    paints = [0]
+    paint = view.delegate.paint
+
+    def counting_paint(painter, option, index):
+        if index.data(MessageRole)["streaming"]:
+            paints[0] += 1
+        paint(painter, option, index)
+
+    view.delegate.paint = counting_paint
+    busy = 0.0
+    begin = due = time.perf_counter()
+    for token in TOKENS:
+        start = time.perf_counter()
+        deliver(view, token)
+        app.processEvents()
+        busy += time.perf_counter() - start
+        due += TOKEN_INTERVAL
+        time.sleep(max(0.0, due - time.perf_counter()))
+    start = time.perf_counter()
+    view.finish_stream(ANSWER)
+    app.processEvents()
+    busy += time.perf_counter() - start
+    wall = time.perf_counter() - begin
+    view.close_transcript()
+    view.close()
+    return busy, wall, paints[0]
+
+
+def main():
+    app = QApplication([])
+    print(f"{len(TOKENS)} tokens ({len(ANSWER) // 1024} KB), one every {TOKEN_INTERVAL * 1e3:.0f} ms, {HISTORY} messages above")
+    print(f"{'':>30} {'Qt busy (s)':>12} {'busy %':>7} {'paints':>7}")
+    for label, interval, deliver in (
+        ("per token, whole message", 0, legacy_delta),
+        ("per token, incremental", 0, TranscriptView.append_delta),
+        (f"coalesced ({DEFAULT_FLUSH_INTERVAL_MS} ms), incremental", DEFAULT_FLUSH_INTERVAL_MS, TranscriptView.append_delta),
+    ):
+        busy, wall, paints = run(app, interval, deliver)
+        print(f"{label:>30} {busy:>12.2f} {busy / wall * 100:>6.0f}% {paints:>7}")
+
+
+if __name__ == "__main__":
+    main()
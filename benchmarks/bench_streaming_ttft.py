@@ -0,0 +1,84 @@
+"""Time to first visible answer token with and without streaming.
+
+Drives ``MCPClient.process_query`` from mcp_client.py against the local stub
+server, which spends ``TOKEN_DELAY`` per generated token. Without streaming
+nothing is visible until the whole answer has arrived; with streaming the
+first reconstructed token is shown as soon as it is decoded. The tool-call
+scenario also shows tools being dispatched before the response finishes.
+
+usage (from the project root): python -m benchmarks.bench_streaming_ttft
+"""
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import time
+
+from mcp.types import CallToolResult, TextContent
+
+from benchmarks.stub_openai_server import StubOpenAIServer
+from llm_client import create_openai_client
+from mcp_client import MCPClient
+
+RUNS = 5
+# Roughly 50 tokens/sec of decoding
+TOKEN_DELAY = 0.02
+TOOL_LATENCY = 0.05
+ANSWER = " ".join(f"word{i}" for i in range(100))
+TOOL_CALLS = [{"id": f"call_{i}", "function": {"name": "get_email_id_from_user_id",
+                                                "arguments": json.dumps({"user_id": f"user{i}"})}} for i in range(3)]
+SCENARIOS = {
+    "direct answer": [{"content": ANSWER}],
+    "3 tool calls + answer": [{"tool_calls": TOOL_CALLS}, {"content": ANSWER}],
+}
+
+
+class FakeSession:
+    """Stands in for the MCP ClientSession with a fixed tool latency"""
+
+    async def list_tools(self) -> list:
+        return []
+
+    async def call_tool(self, name: str, args: dict) -> CallToolResult:
+        await asyncio.sleep(TOOL_LATENCY)
+        return CallToolResult(content=[TextContent(type="text", text=f"{args['user_id']}@test.com")])
+
+
+async def measure(base_url: str, streaming: bool) -> list:
+    client = MCPClient()
+    client.session = FakeSession()
+    client.llm_client = create_openai_client(api_key="stub").with_options(base_url=base_url)
+    samples = []
+    for _ in range(RUNS):
+        first_token = None
+        start = time.perf_counter()
+
+        def on_token(text: str) -> None:
+            nonlocal first_token
+            if first_token is None:
+                first_token = time.perf_counter() - start
+
+        # The client's debug prints would dominate the measurement
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.process_query("email for these users", on_token=on_token if streaming else None)
+        total = time.perf_counter() - start
+        samples.append((first_token if streaming else total, total))
+    await client.llm_client.close()
+    return samples
+
+
+async def main():
+    print(f"{'':>24} {'mode':>10} {'first token p50 (ms)':>21} {'complete p50 (ms)':>18}")
+    for label, script in SCENARIOS.items():
+        for streaming in (False, True):
+            server = StubOpenAIServer(token_delay=TOKEN_DELAY, script=script)
+            samples = await measure(await server.start(), streaming)
+            await server.stop()
+            first = statistics.median(s[0] for s in samples) * 1e3
+            total = statistics.median(s[1] for s in samples) * 1e3
+            print(f"{label:>24} {'stream' if streaming else 'blocking':>10} {first:>21.1f} {total:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
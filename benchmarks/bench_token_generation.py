@@ -0,0 +1,44 @@
+"""Throughput benchmark for redaction token generation.
+
+Reports tokens/sec for the previous salted SHA-256 per occurrence and for
+the keyed ``TokenGenerator`` in ``redaction.py``, on unique addresses (memo
+misses) and on a realistic stream where a few addresses repeat (memo hits).
+
+usage (from the project root): python -m benchmarks.bench_token_generation
+"""
+import hashlib
+import time
+
+import redaction
+
+OCCURRENCES = 200_000
+DISTINCT_ADDRESSES = 50
+
+
+def legacy_token(email: str) -> str:
+    salt = "your_app_specific_salt"
+    return f"EAMIL_{hashlib.sha256((salt + email).encode()).hexdigest()[:8]}"
+
+
+def tokens_per_sec(fn, values: list) -> float:
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main():
+    unique = [f"user{i}@test.com" for i in range(OCCURRENCES)]
+    repeated = [f"user{i % DISTINCT_ADDRESSES}@test.com" for i in range(OCCURRENCES)]
+
+    print(f"{'workload':>22} {'legacy (tok/s)':>16} {'keyed + memo (tok/s)':>22}")
+    for label, values in (("unique addresses", unique), ("50 repeating addresses", repeated)):
+        generator = redaction.TokenGenerator(b"bench-key")
+        legacy = tokens_per_sec(legacy_token, values)
+        keyed = tokens_per_sec(generator, values)
+        print(f"{label:>22} {legacy:>16,.0f} {keyed:>22,.0f}")
+        print(f"{'':>22} memo: {generator.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
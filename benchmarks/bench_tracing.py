@@ -0,0 +1,83 @@
+"""CPU cost of tracing one tool-backed query with a large tool result.
+
+Runs ``MCPClient.process_query`` (LLM -> tool -> LLM) with an in-process
+fake LLM and a fake session returning ``TICKETS`` tickets (about 1 MB),
+at TRACE_LEVEL off, info (spans with durations and sizes) and debug (also
+every payload, roughly what the old print tracing formatted on each step),
+with trace records written to /dev/null.
+
+usage (from the project root): python -m benchmarks.bench_tracing
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from mcp.types import CallToolResult, TextContent
+from openai.types.chat import ChatCompletion
+
+from mcp_client import MCPClient
+from tracing import Tracer
+
+RUNS = 10
+TICKETS = 5000
+RESULT = json.dumps([{"id": f"JIRA-{i}", "assignee": f"user{i % 50}@example.com",
+                      "summary": "Investigate intermittent failures " * 4} for i in range(TICKETS)])
+
+
+def completion(message: dict) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "bench", "object": "chat.completion", "created": 0, "model": "bench",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", **message}}],
+    })
+
+
+class FakeLLM:
+    """Answers with one tool call, then with a short text"""
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    async def create(self, messages: list, **params) -> ChatCompletion:
+        if messages[-1]["role"] == "tool":
+            return completion({"content": "Found the tickets."})
+        call = {"id": "call_1", "type": "function",
+                "function": {"name": "get_tickets_assigned_to_user", "arguments": json.dumps({"user_email": "a@b.com"})}}
+        return completion({"content": None, "tool_calls": [call]})
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeSession:
+    async def list_tools(self) -> list:
+        return []
+
+    async def call_tool(self, name: str, args: dict, **kwargs) -> CallToolResult:
+        return CallToolResult(content=[TextContent(type="text", text=RESULT)])
+
+
+async def measure(level: str) -> float:
+    client = MCPClient()
+    client.session = FakeSession()
+    client.llm_client = FakeLLM()
+    client.tracer = Tracer(level, path=os.devnull)
+    samples = []
+    for _ in range(RUNS):
+        start = time.process_time()
+        await client.process_query("tickets for a@b.com")
+        samples.append(time.process_time() - start)
+    client.tracer.close()
+    return statistics.median(samples)
+
+
+async def main():
+    print(f"query with a {len(RESULT) / 1e6:.1f} MB tool result, CPU time p50 of {RUNS} runs")
+    for level in ("off", "info", "debug"):
+        print(f"TRACE_LEVEL={level:<6} {await measure(level) * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Frame time of appending 5,000 chat messages: QTextEdit vs TranscriptView.
+
+Each frame appends one message (every fifth one a long, tool-backed
+Markdown answer), then lets Qt process events and repaint the window. The
+QTextEdit runs the chat window's former ``insertHtml`` code, which re-lays
+out the whole document as it grows; it stops after ``LEGACY_BUDGET``
+seconds. Runs offscreen unless QT_QPA_PLATFORM is set.
+
+usage (from the project root): python -m benchmarks.bench_transcript
+"""
+import os
+import statistics
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from mcp_client_ui import markdown_to_html
+from transcript_view import TranscriptView, message_html
+
+MESSAGES = 5000
+LEGACY_BUDGET = 60.0
+ANSWER = "\n".join(f"- **JIRA-{i}** Investigate intermittent failures of the nightly build on agent {i}" for i in range(40))
+
+
+def message(i: int) -> tuple:
+    if i % 2 == 0:
+        return "user", f"show me the tickets for user{i}@example.com"
+    return "assistant", ANSWER if i % 5 == 0 else f"User {i} has no open tickets."
+
+
+def format_message(role: str, text: str) -> str:
+    return message_html(role, markdown_to_html(text) if role == "assistant" else text)
+
+
+def legacy_append(display: QTextEdit, role: str, text: str) -> None:
+    cursor = display.textCursor()
+    cursor.movePosition(cursor.End)
+    if cursor.position() > 0:
+        cursor.insertHtml('<br>')
+    body = markdown_to_html(text) if role == "assistant" else text
+    cursor.insertHtml(message_html(role, body))
+    cursor.insertHtml('<br>')
+    display.setTextCursor(cursor)
+    display.ensureCursorVisible()
+    display.verticalScrollBar().setValue(display.verticalScrollBar().maximum())
+
+
+def run(app: QApplication, widget, append, budget: float) -> list:
+    widget.resize(800, 600)
+    widget.show()
+    app.processEvents()
+    frames = []
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        frame_start = time.perf_counter()
+        append(*message(i))
+        app.processEvents()
+        widget.repaint()
+        frames.append(time.perf_counter() - frame_start)
+        if time.perf_counter() - start > budget:
+            break
+    widget.close()
+    return frames
+
+
+def report(label: str, frames: list) -> None:
+    ms = sorted(frame * 1e3 for frame in frames)
+    tail = ms[-len(ms) // 10:]
+    print(f"{label:>15} {len(ms):>9} {statistics.median(ms):>9.2f} {ms[int(len(ms) * 0.95) - 1]:>9.2f} "
+          f"{max(ms):>9.2f} {statistics.mean(tail):>14.2f} {sum(ms) / 1e3:>8.1f}")
+
+
+def main():
+    app = QApplication([])
+    print(f"{'':>15} {'messages':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9} {'last 10% (ms)':>14} {'total (s)':>8}")
+    legacy = QTextEdit()
+    legacy.setReadOnly(True)
+    report("QTextEdit", run(app, legacy, lambda role, text: legacy_append(legacy, role, text), LEGACY_BUDGET))
+    view = TranscriptView(format_message)
+    report("TranscriptView", run(app, view, view.append, float("inf")))
+    view.close_transcript()
+
+
+if __name__ == "__main__":
+    main()
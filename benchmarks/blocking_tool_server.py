@@ -0,0 +1,62 @@
+"""Stdio MCP server with deliberately slow tools, for the server pool and cancellation benchmarks.
+
+``block`` sleeps and ``spin`` burns CPU without yielding, standing in for
+synchronous tools that hold up the single interpreter of a server process.
+``wait`` is a slow asynchronous tool that counts how often it was cancelled
+by the client before finishing.
+"""
+import asyncio
+import os
+import time
+
+from fastmcp import FastMCP
+
+mcp = FastMCP("blocking tools")
+
+
+@mcp.tool()
+def block(ms: int) -> str:
+    """Block the server for ms milliseconds (I/O-style wait)"""
+    time.sleep(ms / 1000)
+    return f"blocked {ms} ms in {os.getpid()}"
+
+
+@mcp.tool()
+def spin(ms: int) -> str:
+    """Keep a CPU core busy for ms milliseconds"""
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+    return f"spun {ms} ms in {os.getpid()}"
+
+
+# Runs of ``wait``, by how they ended
+waits = {"finished": 0, "cancelled": 0}
+
+
+@mcp.tool()
+async def wait(ms: int) -> str:
+    """Wait ms milliseconds without blocking the server"""
+    try:
+        await asyncio.sleep(ms / 1000)
+    except asyncio.CancelledError:
+        waits["cancelled"] += 1
+        raise
+    waits["finished"] += 1
+    return f"waited {ms} ms"
+
+
+@mcp.tool()
+def wait_stats() -> dict:
+    """How many runs of wait finished and how many were cancelled"""
+    return waits
+
+
+@mcp.tool()
+def pid() -> int:
+    """Process id of this server"""
+    return os.getpid()
+
+
+if __name__ == "__main__":
+    mcp.run(transport='stdio', show_banner=False)
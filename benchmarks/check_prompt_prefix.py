@@ -0,0 +1,73 @@
+"""Check that the cacheable prompt prefix is byte-identical across sessions.
+
+Runs the same query in separate ``MCPClient`` sessions against
+mcp_server.py and the local stub server, and compares the serialized tools
+block and system prompt of their first LLM request. The last session lists
+the server's tools in reverse order with reordered schema keys, which must
+not change the prefix either. Also prints the cached prompt tokens the stub
+reports for each session. Exits non-zero when the prefixes differ.
+
+usage (from the project root): python -m benchmarks.check_prompt_prefix
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+
+from benchmarks.stub_openai_server import StubOpenAIServer
+
+QUERY = "show jira tickets for satish.k@test.com"
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mcp_server.py")
+
+
+def shuffled(list_tools):
+    """Wrap list_tools to return the tools reversed, each with its schema keys reversed"""
+    async def reversed_tools():
+        response = await list_tools()
+        return [tool.model_copy(update={"inputSchema": dict(reversed(list(tool.inputSchema.items())))})
+                for tool in reversed(response.tools)]
+    return reversed_tools
+
+
+async def run_session(server: StubOpenAIServer, shuffle: bool) -> tuple:
+    from mcp_client import MCPClient
+
+    client = MCPClient()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await client.connect_to_server(SERVER_SCRIPT)
+            if shuffle:
+                client.tool_catalog._list_tools = shuffled(client.session.list_tools)
+                await client.tool_catalog.refresh()
+            await client.process_query(QUERY)
+    finally:
+        await client.cleanup()
+    request = json.loads(server.last_body)
+    system = [message for message in request["messages"] if message["role"] == "system"]
+    prefix = json.dumps(request["tools"]) + json.dumps(system)
+    return prefix, server.last_usage["prompt_tokens_details"]["cached_tokens"]
+
+
+async def main() -> int:
+    server = StubOpenAIServer(cache_min_tokens=128)
+    os.environ["OPENAI_BASE_URL"] = await server.start()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("LLM_SYSTEM_PROMPT", "You are a helpful assistant for JIRA, email and weather questions.")
+    prefixes = []
+    for label, shuffle in (("session 1", False), ("session 2", False), ("session 3 (shuffled)", True)):
+        prefix, cached = await run_session(server, shuffle)
+        prefixes.append(prefix)
+        print(f"{label:>22}: prefix {len(prefix):,} bytes, cached prompt tokens reported {cached}")
+    await server.stop()
+
+    if len(set(prefixes)) != 1:
+        print("FAIL: the serialized prompt prefix differs between sessions")
+        return 1
+    print("OK: the serialized prompt prefix is byte-identical across sessions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
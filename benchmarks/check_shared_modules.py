@@ -0,0 +1,50 @@
+"""Check that the shared modules copied into mcp-http/ match the project root.
+
+The HTTP clients in mcp-http/ are run from that directory, so the modules
+they share with the stdio clients (redaction, llm_client, tool_catalog, ...)
+are kept there as copies. Every .py file in mcp-http/ whose name also
+exists at the root is such a copy and must be byte-identical to it. Prints
+the copies that differ, with a unified diff, and exits non-zero. With
+``--sync`` the root versions are copied over the stale ones instead.
+
+usage (from the project root): python -m benchmarks.check_shared_modules [--sync]
+"""
+import os
+import sys
+import difflib
+import shutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COPY_DIR = os.path.join(ROOT, "mcp-http")
+
+
+def shared_modules() -> list:
+    return sorted(name for name in os.listdir(COPY_DIR)
+                  if name.endswith(".py") and os.path.isfile(os.path.join(ROOT, name)))
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main() -> int:
+    sync = "--sync" in sys.argv[1:]
+    stale = []
+    for name in shared_modules():
+        original, copy = os.path.join(ROOT, name), os.path.join(COPY_DIR, name)
+        if read(original) == read(copy):
+            continue
+        stale.append(name)
+        if sync:
+            shutil.copyfile(original, copy)
+            print(f"synced mcp-http/{name}")
+        else:
+            sys.stdout.writelines(difflib.unified_diff(
+                read(original).splitlines(True), read(copy).splitlines(True), name, f"mcp-http/{name}"))
+    print(f"{len(shared_modules())} shared modules, {len(stale)} {'synced' if sync else 'out of sync'}")
+    return 1 if stale and not sync else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
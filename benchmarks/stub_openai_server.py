@@ -0,0 +1,191 @@
+"""Minimal local OpenAI-compatible HTTP server for client benchmarks.
+
+Speaks just enough HTTP/1.1 (with keep-alive) to answer ``GET /v1/models``
+and ``POST /v1/chat/completions``, streamed (SSE) or not. Replies come from
+an optional script of assistant messages (plain content or tool calls),
+cycled per request. Each new connection can be delayed to stand in for the
+TCP/TLS handshake of a real provider, and each generated token costs
+``token_delay`` seconds to mimic model decoding speed. Prompt caching is
+simulated like OpenAI's: the longest prefix shared with an earlier prompt
+(tools, then messages) is reported as ``cached_tokens`` in 128-token steps
+once it reaches ``cache_min_tokens``.
+
+usage: python -m benchmarks.stub_openai_server [port]
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import List, Optional
+
+DEFAULT_REPLY = "Here are the tickets you asked for."
+
+
+class StubOpenAIServer:
+    def __init__(self, connect_delay: float = 0.0, response_delay: float = 0.0, token_delay: float = 0.0,
+                 reply: str = DEFAULT_REPLY, script: Optional[List[dict]] = None, cache_min_tokens: int = 1024):
+        self.connect_delay = connect_delay
+        self.response_delay = response_delay
+        self.token_delay = token_delay
+        self.script = script or [{"content": reply}]
+        self.connections = 0
+        self.requests = 0
+        self.completions = 0
+        # Stream chunks written so far; stops growing once a client drops its stream
+        self.chunks_sent = 0
+        self.cache_min_tokens = cache_min_tokens
+        self.last_request: Optional[dict] = None
+        self.last_body: bytes = b""
+        self.last_usage: Optional[dict] = None
+        self._prompts: List[str] = []
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def next_message(self) -> dict:
+        message = self.script[self.completions % len(self.script)]
+        self.completions += 1
+        return message
+
+    @staticmethod
+    def tokens(text: str) -> List[str]:
+        return re.findall(r'\S+\s*|\s+', text or "")
+
+    def usage(self, request: dict) -> dict:
+        prompt = json.dumps(request.get("tools", [])) + json.dumps(request.get("messages", []))
+        prompt_tokens = len(prompt) // 4
+        cached_tokens = max((len(os.path.commonprefix([prompt, seen])) // 4 for seen in self._prompts), default=0)
+        cached_tokens = cached_tokens // 128 * 128 if cached_tokens >= self.cache_min_tokens else 0
+        self._prompts.append(prompt)
+        self.last_usage = {"prompt_tokens": prompt_tokens, "completion_tokens": 10, "total_tokens": prompt_tokens + 10,
+                           "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+        return self.last_usage
+
+    def completion(self, request: dict, message: dict) -> dict:
+        tool_calls = [{"id": call["id"], "type": "function", "function": call["function"]}
+                      for call in message.get("tool_calls", [])]
+        return {
+            "id": f"chatcmpl-stub-{self.completions}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {"role": "assistant", "content": message.get("content"), "tool_calls": tool_calls or None},
+            }],
+            "usage": self.usage(request),
+        }
+
+    def chunks(self, request: dict, message: dict):
+        base = {"id": f"chatcmpl-stub-{self.completions}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model", "stub")}
+
+        def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+            return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+
+        yield chunk({"role": "assistant", "content": ""})
+        for token in self.tokens(message.get("content")):
+            yield chunk({"content": token})
+        for index, call in enumerate(message.get("tool_calls", [])):
+            yield chunk({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                         "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            for piece in self.tokens(call["function"]["arguments"]):
+                yield chunk({"tool_calls": [{"index": index, "function": {"arguments": piece}}]})
+        yield chunk({}, "tool_calls" if message.get("tool_calls") else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield dict(base, choices=[], usage=self.usage(request))
+
+    async def _respond_json(self, writer: asyncio.StreamWriter, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(data)).encode() + b"\r\n\r\n" + data
+        )
+        await writer.drain()
+
+    async def _respond_stream(self, writer: asyncio.StreamWriter, request: dict, message: dict) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n")
+        for chunk in self.chunks(request, message):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            event = f"data: {json.dumps(chunk)}\n\n".encode()
+            writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            await writer.drain()
+            self.chunks_sent += 1
+        done = b"data: [DONE]\n\n"
+        writer.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                if self.response_delay:
+                    await asyncio.sleep(self.response_delay)
+
+                if method == "GET" and path.endswith("/models"):
+                    await self._respond_json(writer, {"object": "list", "data": [
+                        {"id": "gpt-4-turbo", "object": "model", "created": 0, "owned_by": "stub"}]})
+                elif method == "POST" and path.endswith("/chat/completions"):
+                    request = json.loads(body or b"{}")
+                    self.last_request = request
+                    self.last_body = body
+                    message = self.next_message()
+                    if request.get("tool_choice") == "none" and message.get("tool_calls"):
+                        message = {"content": "Answer from the tool results so far."}
+                    if request.get("stream"):
+                        await self._respond_stream(writer, request, message)
+                    else:
+                        # A non-streamed reply is only sent once every token is generated
+                        if self.token_delay:
+                            tokens = len(self.tokens(message.get("content"))) + sum(
+                                len(self.tokens(c["function"]["arguments"])) + 1 for c in message.get("tool_calls", []))
+                            await asyncio.sleep(self.token_delay * (tokens + 2))
+                        await self._respond_json(writer, self.completion(request, message))
+                else:
+                    await self._respond_json(writer, {"error": {"message": f"unknown path {path}"}})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    server = StubOpenAIServer()
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8900
+    print(f"Stub OpenAI server at {await server.start(port=port)}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import contextvars
+from typing import Any, Awaitable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (session, request id) of the MCP requests sent by the innermost cancellable() call
+_sent_requests: contextvars.ContextVar[Optional[List[Tuple[Any, int]]]] = contextvars.ContextVar("mcp_sent_requests", default=None)
+
+
+class AbortedWork:
+    """Work a client abandoned: queries the user cancelled, and LLM and tool calls cut off by a cancel or the query deadline"""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0         # how long the cancelled queries had been running
+        self.llm_calls = 0
+        self.streamed_chars = 0    # answer text the model had already generated, and billed, when its call was aborted
+        self.tool_calls = 0
+        self.notifications = 0     # notifications/cancelled sent to MCP servers
+
+    def summary(self) -> str:
+        return (f"{self.queries} queries cancelled after {self.seconds:.1f}s in total, "
+                f"{self.llm_calls} LLM calls aborted ({self.streamed_chars} chars already streamed), "
+                f"{self.tool_calls} tool calls aborted ({self.notifications} cancellation notices sent)")
+
+
+def track_requests(session: Any) -> Any:
+    """Make an MCP ClientSession record the id of every request sent from within cancellable().
+
+    The MCP SDK forgets a request when the task awaiting it is cancelled,
+    without telling the server, which keeps working on it. Recording the id
+    lets cancellable() send the notifications/cancelled the protocol
+    expects. Returns the session.
+    """
+    if getattr(session, "_tracks_requests", False):
+        return session
+    send_request = session.send_request
+
+    async def tracked_send_request(*args: Any, **kwargs: Any) -> Any:
+        sent = _sent_requests.get()
+        if sent is not None:
+            # BaseSession numbers requests from _request_id, which send_request takes before its first await
+            sent.append((session, session._request_id))
+        return await send_request(*args, **kwargs)
+
+    session.send_request = tracked_send_request
+    session._tracks_requests = True
+    return session
+
+
+async def notify_cancelled(session: Any, request_id: int, reason: str) -> bool:
+    """Send notifications/cancelled for a request; False when the session is already gone"""
+    from mcp import types
+
+    notification = types.CancelledNotification(
+        method="notifications/cancelled",
+        params=types.CancelledNotificationParams(requestId=request_id, reason=reason),
+    )
+    try:
+        await session.send_notification(types.ClientNotification(notification))
+        return True
+    except Exception as e:
+        logger.debug(f"Could not send cancellation of MCP request {request_id}: {e}")
+        return False
+
+
+async def cancellable(awaitable: Awaitable[T], aborted: Optional[AbortedWork] = None,
+                      reason: str = "Cancelled by the client") -> T:
+    """Await an MCP call, telling the server to stop when the call is cancelled or times out.
+
+    The sessions involved must have been passed to track_requests().
+    """
+    sent: List[Tuple[Any, int]] = []
+    token = _sent_requests.set(sent)
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        if aborted is not None:
+            aborted.tool_calls += 1
+        for session, request_id in sent:
+            if await notify_cancelled(session, request_id, reason) and aborted is not None:
+                aborted.notifications += 1
+        raise
+    finally:
+        _sent_requests.reset(token)
@@ -0,0 +1,64 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Per-query limits; each can be overridden with the matching environment variable
+DEFAULT_QUERY_TIMEOUT = 120.0   # QUERY_TIMEOUT (seconds for the whole tool loop, 0 for no deadline)
+DEFAULT_MAX_TOOL_ITERATIONS = 8  # MAX_TOOL_ITERATIONS (LLM rounds that may request tools)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a step of a query cannot finish before the query's deadline"""
+
+
+def max_tool_iterations() -> int:
+    return int(os.getenv("MAX_TOOL_ITERATIONS", DEFAULT_MAX_TOOL_ITERATIONS))
+
+
+class Deadline:
+    """Absolute deadline of one query, shared by all of its LLM and tool steps.
+
+    Each step gets the time that is left as its timeout, so the query as a
+    whole never runs longer than ``seconds`` no matter how many steps the
+    model asks for.
+
+    Args:
+        seconds: Budget of the query, None (or 0 via QUERY_TIMEOUT) for no deadline
+    """
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self.expires_at = clock() + seconds if seconds else None
+
+    @classmethod
+    def from_env(cls) -> "Deadline":
+        return cls(float(os.getenv("QUERY_TIMEOUT", DEFAULT_QUERY_TIMEOUT)) or None)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and self._clock() >= self.expires_at
+
+    async def run(self, awaitable: Awaitable[T], step: str) -> T:
+        """Await one step with the remaining time as its timeout"""
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(f"no time left for {step} (query deadline of {self.seconds:g}s)")
+        try:
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError as e:
+            if isinstance(e, DeadlineExceeded):
+                raise
+            raise DeadlineExceeded(f"{step} did not finish within the query deadline of {self.seconds:g}s") from None
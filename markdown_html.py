@@ -0,0 +1,102 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Renderer cache defaults; each can be overridden with the matching environment variable
+DEFAULT_CACHE_SIZE = 256         # MARKDOWN_CACHE_SIZE (rendered messages kept)
+DEFAULT_CACHE_CHARS = 16_000_000  # MARKDOWN_CACHE_CHARS (total characters of rendered HTML kept)
+
+
+class MarkdownRenderer:
+    """Converts the basic Markdown of LLM answers to HTML for the chat transcript.
+
+    Supports **bold** and "- " bullets (shown as "•"); line breaks become
+    <br> and blank lines are collapsed to one. The patterns are compiled once
+    and each rule is one pass over the whole text, which is faster than
+    looping over its lines in Python. Rendered messages are kept in an LRU
+    cache keyed on a hash of their text, so rendering the same answer again
+    (a row read back from disk, a repaint after a resize or theme change)
+    costs a hash instead of a conversion.
+
+    Args:
+        cache_size: Rendered messages kept, defaults to MARKDOWN_CACHE_SIZE
+        cache_chars: Total characters of rendered HTML kept, defaults to MARKDOWN_CACHE_CHARS
+    """
+
+    BOLD = re.compile(r'\*\*(.*?)\*\*')
+    # A "- " bullet needs some text after it; the first line is handled separately
+    DASH_BULLET = re.compile(r'\n- (?=[^\n])')
+    BLANK_LINE = re.compile(r'\n[^\S\n]+(?=\n|\Z)')
+    LEADING_BLANK_LINE = re.compile(r'[^\S\n]+(?=\n|\Z)')
+    BREAK_RUN = re.compile(r'(?:<br>){3,}')
+
+    def __init__(self, cache_size: Optional[int] = None, cache_chars: Optional[int] = None):
+        if cache_size is None:
+            cache_size = int(os.getenv("MARKDOWN_CACHE_SIZE", DEFAULT_CACHE_SIZE))
+        if cache_chars is None:
+            cache_chars = int(os.getenv("MARKDOWN_CACHE_CHARS", DEFAULT_CACHE_CHARS))
+        self.cache_size = cache_size
+        self.cache_chars = cache_chars
+        # digest of the text -> HTML, in least recently used order
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._cached_chars = 0
+        # Answers may be rendered on a worker thread (UI_CPU_OFFLOAD) while the view renders on the Qt thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _strong(match: "re.Match") -> str:
+        return '<strong>' + match.group(1) + '</strong>'
+
+    def convert(self, text: str) -> str:
+        """HTML of ``text`` without going through the cache, e.g. for one streamed line"""
+        if not text:
+            return text
+        if '**' in text:
+            text = self.BOLD.sub(self._strong, text)
+        if text.startswith('- ') and text[2:3] not in ('', '\n'):
+            text = '• ' + text[2:]
+        text = self.DASH_BULLET.sub('\n• ', text)
+        # Lines holding only whitespace count as blank
+        leading = self.LEADING_BLANK_LINE.match(text)
+        if leading:
+            text = text[leading.end():]
+        text = self.BLANK_LINE.sub('\n', text)
+        if '<br>' in text:
+            # Breaks already in the text take part in collapsing the blank lines
+            html = text.replace('\n', '<br>')
+            return self.BREAK_RUN.sub('<br><br>', html) if '<br><br><br>' in html else html
+        while '\n\n\n' in text:
+            text = text.replace('\n\n\n', '\n\n')
+        return text.replace('\n', '<br>')
+
+    def render(self, text: str) -> str:
+        """HTML of ``text``, from the cache when the same text was rendered before"""
+        if not text:
+            return text
+        key = hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = self.convert(text)
+        if len(html) > self.cache_chars or self.cache_size <= 0:
+            return html
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = html
+                self._cached_chars += len(html)
+            while len(self._cache) > self.cache_size or self._cached_chars > self.cache_chars:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_chars -= len(evicted)
+        return html
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache), "chars": self._cached_chars}
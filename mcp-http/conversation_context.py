@@ -0,0 +1,144 @@
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+# Budget defaults; each can be overridden with the matching environment variable
+DEFAULT_TOKEN_BUDGET = 16000      # CONTEXT_TOKEN_BUDGET (estimated prompt tokens, 0 disables compaction)
+DEFAULT_KEEP_RECENT_TURNS = 1     # CONTEXT_KEEP_RECENT_TURNS (tool rounds kept verbatim)
+DEFAULT_SUMMARY_CHARS = 500       # CONTEXT_SUMMARY_CHARS (head of a compacted tool output that is kept)
+
+# Rough average for English text and JSON with the GPT-4 tokenizers
+CHARS_PER_TOKEN = 4
+# Fixed per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def content_text(content: Any) -> str:
+    """Flatten message or tool result content (str, TextContent list, dicts) to text"""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, (list, tuple)):
+        return "\n".join(content_text(item) for item in content)
+    text = getattr(content, 'text', None)
+    if isinstance(text, str):
+        return text
+    if isinstance(content, dict):
+        if isinstance(content.get('text'), str):
+            return content['text']
+        return json.dumps(content, default=str)
+    return str(content)
+
+
+def estimate_tokens(message: Dict[str, Any]) -> int:
+    """Estimated prompt tokens of one chat message"""
+    chars = len(content_text(message.get("content")))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.function if hasattr(tool_call, 'function') else tool_call["function"]
+        name = function.name if hasattr(function, 'name') else function["name"]
+        arguments = function.arguments if hasattr(function, 'arguments') else function["arguments"]
+        chars += len(name) + len(arguments)
+    return MESSAGE_OVERHEAD_TOKENS + (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class ConversationContext:
+    """Token-budgeted message list for the tool loop of one query.
+
+    ``messages`` is the plain list sent to the LLM; callers append to it as
+    before. ``compact()`` runs before each LLM call: once the estimated total
+    exceeds ``token_budget``, tool outputs older than the last
+    ``keep_recent_turns`` tool rounds are replaced, oldest first, by a short
+    head of their text plus a note of how much was dropped. User and
+    assistant messages are never changed.
+
+    Args:
+        messages: Initial messages, normally the user query
+        token_budget: Estimated prompt tokens to stay under, 0 or None to never compact
+        keep_recent_turns: Number of most recent tool rounds whose outputs stay verbatim
+        summary_chars: Characters of a compacted tool output that are kept
+    """
+
+    def __init__(self, messages: Optional[List[Dict[str, Any]]] = None, token_budget: Optional[int] = None,
+                 keep_recent_turns: Optional[int] = None, summary_chars: Optional[int] = None):
+        if token_budget is None:
+            token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+        if keep_recent_turns is None:
+            keep_recent_turns = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", DEFAULT_KEEP_RECENT_TURNS))
+        if summary_chars is None:
+            summary_chars = int(os.getenv("CONTEXT_SUMMARY_CHARS", DEFAULT_SUMMARY_CHARS))
+        self.messages: List[Dict[str, Any]] = list(messages or [])
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.summary_chars = summary_chars
+        # Estimated tokens per message, kept in step with self.messages
+        self.tokens: List[int] = []
+        self._compacted = set()
+        self.compacted_messages = 0
+        self.tokens_saved = 0
+
+    def _sync(self) -> None:
+        """Estimate messages appended since the last call"""
+        for message in self.messages[len(self.tokens):]:
+            self.tokens.append(estimate_tokens(message))
+
+    @property
+    def total_tokens(self) -> int:
+        self._sync()
+        return sum(self.tokens)
+
+    def _protected_from(self) -> int:
+        """Index of the first message belonging to the most recent tool rounds"""
+        if self.keep_recent_turns <= 0:
+            return len(self.messages)
+        rounds = 0
+        for index in range(len(self.messages) - 1, -1, -1):
+            message = self.messages[index]
+            if message.get("role") == "assistant" and message.get("tool_calls"):
+                rounds += 1
+                if rounds >= self.keep_recent_turns:
+                    return index
+        return 0 if rounds else len(self.messages)
+
+    def _summarize(self, message: Dict[str, Any]) -> str:
+        text = content_text(message.get("content"))
+        return (f"[Earlier output of tool {message.get('name', 'unknown')} compacted to save context; "
+                f"{len(text) - self.summary_chars} of {len(text)} characters omitted]\n{text[:self.summary_chars]}")
+
+    def compact(self) -> int:
+        """Compact stale tool outputs until the estimate fits the budget; returns tokens saved"""
+        self._sync()
+        total = sum(self.tokens)
+        if not self.token_budget or total <= self.token_budget:
+            return 0
+
+        saved = 0
+        for index in range(self._protected_from()):
+            if total - saved <= self.token_budget:
+                break
+            message = self.messages[index]
+            if message.get("role") != "tool" or index in self._compacted:
+                continue
+            if len(content_text(message.get("content"))) <= self.summary_chars:
+                continue
+            # Replace rather than mutate: the original content may be shared with the caller
+            compacted = {key: value for key, value in message.items() if key != "content"}
+            compacted["content"] = self._summarize(message)
+            self.messages[index] = compacted
+            tokens = estimate_tokens(compacted)
+            saved += self.tokens[index] - tokens
+            self.tokens[index] = tokens
+            self._compacted.add(index)
+            self.compacted_messages += 1
+
+        self.tokens_saved += saved
+        return saved
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": len(self.messages),
+            "estimated_tokens": self.total_tokens,
+            "token_budget": self.token_budget,
+            "compacted_messages": self.compacted_messages,
+            "tokens_saved": self.tokens_saved,
+        }
@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import importlib.util
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+# openai and httpx are imported where they are used: they are the slowest part of a
+# client's startup and are not needed until the first request
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat import ChatCompletion
+    from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
+
+logger = logging.getLogger(__name__)
+
+# Connection pool defaults; each can be overridden with the matching environment variable
+DEFAULT_MAX_CONNECTIONS = 20           # OPENAI_MAX_CONNECTIONS
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10  # OPENAI_MAX_KEEPALIVE_CONNECTIONS
+DEFAULT_KEEPALIVE_EXPIRY = 120.0        # OPENAI_KEEPALIVE_EXPIRY (seconds)
+
+
+def create_openai_client(api_key: Optional[str] = None, max_connections: Optional[int] = None,
+                         max_keepalive_connections: Optional[int] = None,
+                         keepalive_expiry: Optional[float] = None,
+                         http2: Optional[bool] = None) -> "AsyncOpenAI":
+    """Create the long-lived AsyncOpenAI client an MCPClient keeps for all its queries.
+
+    Reusing one client keeps its HTTP connection pool, so later requests skip
+    the TCP/TLS handshake. HTTP/2 (OPENAI_HTTP2=1) needs the optional ``h2``
+    package and falls back to HTTP/1.1 when it is not installed. Creating it
+    imports openai, so clients call this in a worker thread while their MCP
+    server starts.
+    """
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    if max_connections is None:
+        max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    if max_keepalive_connections is None:
+        max_keepalive_connections = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", DEFAULT_MAX_KEEPALIVE_CONNECTIONS))
+    if keepalive_expiry is None:
+        keepalive_expiry = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", DEFAULT_KEEPALIVE_EXPIRY))
+    if http2 is None:
+        http2 = os.getenv("OPENAI_HTTP2", "0").lower() in ("1", "true", "yes")
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("OPENAI_HTTP2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        http2=http2,
+    )
+    return AsyncOpenAI(api_key=api_key or os.environ["OPENAI_API_KEY"], http_client=http_client)
+
+
+def warm_up_enabled() -> bool:
+    """Warm-up runs by default; set OPENAI_WARMUP=0 to skip it"""
+    return os.getenv("OPENAI_WARMUP", "1").lower() not in ("0", "false", "no")
+
+
+async def warm_up(client: "AsyncOpenAI") -> bool:
+    """Open a pooled connection ahead of the first query.
+
+    Issues a cheap authenticated request so DNS, TCP and TLS setup happen
+    while the MCP server is still starting. Failures are logged and ignored.
+    """
+    try:
+        await client.with_options(max_retries=0, timeout=10.0).models.list()
+        return True
+    except Exception as e:
+        logger.warning(f"OpenAI warm-up failed: {e}")
+        return False
+
+
+def system_messages() -> List[Dict[str, str]]:
+    """Static system prompt (LLM_SYSTEM_PROMPT) placed ahead of every conversation.
+
+    It must not contain per-session values such as timestamps, so that it
+    stays part of the cacheable prompt prefix together with the tools.
+    """
+    prompt = os.getenv("LLM_SYSTEM_PROMPT")
+    return [{"role": "system", "content": prompt}] if prompt else []
+
+
+def log_usage(response: "ChatCompletion") -> Dict[str, int]:
+    """Log prompt, cached and completion token counts of a response and return them"""
+    usage = response.usage
+    if usage is None:
+        return {}
+    details = usage.prompt_tokens_details
+    summary = {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": (details.cached_tokens or 0) if details is not None else 0,
+        "completion_tokens": usage.completion_tokens,
+    }
+    logger.info(f"OpenAI usage: {summary}")
+    return summary
+
+
+class TokenUsage:
+    """Running totals of the token counts returned by log_usage, for the clients' stats output"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, summary: Dict[str, int]) -> Dict[str, int]:
+        """Count one response's log_usage summary and return it"""
+        if summary:
+            self.calls += 1
+            self.prompt_tokens += summary["prompt_tokens"]
+            self.cached_tokens += summary["cached_tokens"]
+            self.completion_tokens += summary["completion_tokens"]
+        return summary
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens, "completion_tokens": self.completion_tokens}
+
+
+def streaming_enabled() -> bool:
+    """Streamed completions are on by default; set OPENAI_STREAM=0 to wait for whole responses"""
+    return os.getenv("OPENAI_STREAM", "1").lower() not in ("0", "false", "no")
+
+
+async def stream_chat_completion(client: "AsyncOpenAI", on_text: Callable[[str], None],
+                                 on_tool_call: Optional[Callable[["ChatCompletionMessageToolCall"], None]] = None,
+                                 **params: Any) -> "ChatCompletion":
+    """Run a streamed chat completion and assemble it into a regular ChatCompletion.
+
+    ``on_text`` receives content deltas as they arrive. Tool call deltas are
+    accumulated per index; a call is complete once the model moves on to the
+    next index (or the stream ends), at which point it is handed to
+    ``on_tool_call`` so it can be dispatched before the response finishes.
+    """
+    from openai.types.chat import ChatCompletion, ChatCompletionMessage
+    from openai.types.chat.chat_completion import Choice
+    from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall, Function
+
+    stream = await client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **params)
+    content = []
+    calls: Dict[int, Dict[str, Any]] = {}
+    tool_calls = []
+    current = None
+    finish_reason = "stop"
+    chunk = None
+    usage = None
+
+    def complete_call(index: int) -> None:
+        entry = calls[index]
+        tool_call = ChatCompletionMessageToolCall(
+            id=entry["id"], type="function",
+            function=Function(name=entry["name"], arguments="".join(entry["arguments"]))
+        )
+        tool_calls.append(tool_call)
+        if on_tool_call is not None:
+            on_tool_call(tool_call)
+
+    try:
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+            delta = choice.delta
+            if delta.content:
+                content.append(delta.content)
+                on_text(delta.content)
+            for tool_delta in delta.tool_calls or []:
+                if current is not None and tool_delta.index != current:
+                    complete_call(current)
+                current = tool_delta.index
+                entry = calls.setdefault(tool_delta.index, {"id": None, "name": "", "arguments": []})
+                if tool_delta.id:
+                    entry["id"] = tool_delta.id
+                if tool_delta.function is not None:
+                    if tool_delta.function.name:
+                        entry["name"] += tool_delta.function.name
+                    if tool_delta.function.arguments:
+                        entry["arguments"].append(tool_delta.function.arguments)
+    except BaseException:
+        # A cancelled read already drops the connection; closing covers errors raised by the callbacks too,
+        # so an abandoned completion never keeps generating (and billing) tokens
+        close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+        raise
+    if current is not None:
+        complete_call(current)
+
+    message = ChatCompletionMessage(role="assistant", content="".join(content) or None, tool_calls=tool_calls or None)
+    return ChatCompletion(
+        id=chunk.id if chunk is not None else "",
+        object="chat.completion",
+        created=chunk.created if chunk is not None else int(time.time()),
+        model=chunk.model if chunk is not None else params.get("model", ""),
+        choices=[Choice(index=0, finish_reason=finish_reason, message=message)],
+        usage=usage,
+    )
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Event loop guard defaults; each can be overridden with the matching environment variable
+DEFAULT_LAG_THRESHOLD_MS = 100  # LOOP_LAG_THRESHOLD_MS (loop delays reported as stalls, 0 disables the monitor)
+DEFAULT_LAG_INTERVAL_MS = 50    # LOOP_LAG_INTERVAL_MS (heartbeat period)
+DEFAULT_CPU_WORKERS = 2         # UI_CPU_WORKERS (threads for CPU-bound steps when UI_CPU_OFFLOAD=1)
+
+
+def _frame_location(frame: Any) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+
+
+class LoopLagMonitor:
+    """Reports event loop stalls together with the coroutine that held the loop.
+
+    A heartbeat coroutine sleeps ``interval`` seconds at a time and measures
+    how late it wakes up. Reading that lag after the fact can't tell who
+    caused it, so a watchdog thread checks the heartbeat as well: once it
+    is late by more than the threshold, the watchdog records the task the
+    loop is running and where the loop thread is executing right now. When
+    the loop gets back to the heartbeat, the stall is logged as a warning
+    (and traced as a ``loop_stall`` event) with that culprit. A stall in Qt
+    code outside any task shows up with no task, at the Python slot on the
+    stack.
+
+    Args:
+        threshold: Seconds of lag reported as a stall, defaults to LOOP_LAG_THRESHOLD_MS; 0 disables the monitor
+        interval: Seconds between heartbeats, defaults to LOOP_LAG_INTERVAL_MS
+        on_stall: Called with (lag in seconds, culprit) for every stall
+    """
+
+    def __init__(self, threshold: Optional[float] = None, interval: Optional[float] = None,
+                 on_stall: Optional[Callable[[float, str], None]] = None):
+        if threshold is None:
+            threshold = float(os.getenv("LOOP_LAG_THRESHOLD_MS", DEFAULT_LAG_THRESHOLD_MS)) / 1e3
+        if interval is None:
+            interval = float(os.getenv("LOOP_LAG_INTERVAL_MS", DEFAULT_LAG_INTERVAL_MS)) / 1e3
+        self.threshold = threshold
+        self.interval = interval
+        self.on_stall = on_stall
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # When the heartbeat is next due; None until the loop runs it for the first time
+        self._due: Optional[float] = None
+        self._culprit: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Start monitoring ``loop``, which must run in the calling thread"""
+        if not self.enabled or self._heartbeat_task is not None:
+            return
+        self._loop = loop or asyncio.get_event_loop()
+        self._loop_thread = threading.get_ident()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - self._due
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _watch(self) -> None:
+        # Checks often enough to catch a stall while it is still going on
+        period = min(self.interval, self.threshold / 2)
+        while not self._stopped.wait(period):
+            due = self._due
+            if due is not None and self._culprit is None and time.monotonic() - due >= self.threshold:
+                self._culprit = self._sample()
+
+    def _sample(self) -> str:
+        """What the loop thread is running right now"""
+        parts = []
+        task = asyncio.current_task(self._loop)
+        if task is not None:
+            coro = task.get_coro()
+            parts.append(f"coroutine {getattr(coro, '__qualname__', coro)} ({task.get_name()})")
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is not None:
+            parts.append(f"at {_frame_location(frame)}")
+        return " ".join(parts) or "unknown"
+
+    def _report(self, lag: float) -> None:
+        culprit = self._culprit or "unknown (the stall ended before the watchdog sampled it)"
+        self._culprit = None
+        self.stalls += 1
+        self.stalled_seconds += lag
+        logger.warning(f"Event loop stalled for {lag * 1e3:.0f} ms in {culprit}")
+        get_tracer().event("loop_stall", lag_ms=round(lag * 1e3, 1), culprit=culprit)
+        if self.on_stall is not None:
+            self.on_stall(lag, culprit)
+
+    def stats(self) -> dict:
+        return {"stalls": self.stalls, "stalled_ms": round(self.stalled_seconds * 1e3, 1),
+                "max_lag_ms": round(self.max_lag * 1e3, 1)}
+
+
+class CpuOffload:
+    """Runs CPU-bound steps (redaction, Markdown rendering, JSON decoding) on a worker thread pool.
+
+    Off by default, when the steps simply run inline on the event loop.
+    Pure Python work still holds the GIL in a worker, but the interpreter
+    switches threads every few milliseconds (sys.getswitchinterval), so the
+    loop keeps painting and handling input while a large tool result is
+    redacted instead of freezing until it is done. The steps must be
+    thread-safe; RedactionVault and MarkdownRenderer lock their state.
+
+    Args:
+        enabled: Defaults to UI_CPU_OFFLOAD
+        max_workers: Worker threads, defaults to UI_CPU_WORKERS
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_workers: Optional[int] = None):
+        if enabled is None:
+            enabled = os.getenv("UI_CPU_OFFLOAD", "0").lower() in ("1", "true", "yes")
+        if max_workers is None:
+            max_workers = int(os.getenv("UI_CPU_WORKERS", DEFAULT_CPU_WORKERS))
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cpu-offload") if enabled else None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._executor is None:
+            return fn(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,171 +1,301 @@
+# Profile imports when started with --profile-startup; this has to run before the imports below
+import startup
+startup.enable()
 import asyncio
-from typing import Optional,Any, Dict, List, Union
-from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
+from typing import TYPE_CHECKING, Optional,Any, Callable, Dict, List
 from dotenv import load_dotenv
-import re
 import os
-import hashlib
-from openai import AsyncOpenAI
 import json 
 import uuid
-from fastmcp import Client
+import time
 
-load_dotenv()  # load environment variables from .env
+from redaction import (
+    RedactionVault, redact_emails_in_text, redact_emails_in_content,
+    reconstruct_emails_in_content, StreamingReconstructor
+)
+from tool_catalog import ToolCatalog
+from tool_result_cache import ToolResultCache
+from conversation_context import ConversationContext
+from tracing import get_tracer, payload_size
+from deadline import Deadline, DeadlineExceeded, max_tool_iterations
+from llm_client import (
+    create_openai_client, warm_up, warm_up_enabled, stream_chat_completion, streaming_enabled,
+    system_messages, log_usage, TokenUsage
+)
 
-# Global cache for redaction mapping
-REDACTION_CACHE: Dict[str, str] = {}
-
-def generate_redaction_token(email: str) -> str:
-    salt = "your_app_specific_salt"
-    return f"EAMIL_{hashlib.sha256((salt + email).encode()).hexdigest()[:8]}"
-
-def redact_emails_in_text(text: str) -> str:
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    for email in emails:
-        token = generate_redaction_token(email)
-        REDACTION_CACHE[token] = email
-        text = text.replace(email, token)
-    return text
-
-def redact_emails_in_content(content: Union[List, Dict, Any]) -> Union[List, Dict, Any]:
-    if hasattr(content, 'text') and hasattr(content, 'type'):
-        # Handle TextContent-like objects
-        redacted_text = redact_emails_in_text(content.text)
-        return type(content)(
-            type=content.type,
-            text=redacted_text,
-            annotations=getattr(content, 'annotations', None),
-            meta=getattr(content, 'meta', None)
-        )
-    elif isinstance(content, list):
-        return [redact_emails_in_content(item) for item in content]
-    elif isinstance(content, dict):
-        return {k: redact_emails_in_content(v) for k, v in content.items()}
-    elif isinstance(content, str):
-        return redact_emails_in_text(content)
-    else:
-        return content
-    
-def reconstruct_emails_in_content(content: Union[List, Dict, Any]) -> Union[List, Dict, Any]:
-    if hasattr(content, 'text'):
-        reconstructed_text = reconstruct_emails_in_text(content.text)
-        return type(content)(
-            type=content.type,
-            text=reconstructed_text,
-            annotations=getattr(content, 'annotations', None),
-            meta=getattr(content, 'meta', None)
-        )
-    elif isinstance(content, list):
-        return [reconstruct_emails_in_content(item) for item in content]
-    elif isinstance(content, dict):
-        return {k: reconstruct_emails_in_content(v) for k, v in content.items()}
-    elif isinstance(content, str):
-        for token, email in REDACTION_CACHE.items():
-            content = content.replace(token, email)
-        return content
-    else:
-        return content
-
-def reconstruct_emails_in_text(text: str) -> str:
-    """Reconstruct emails in plain text"""
-    if not isinstance(text, str):
-        return text
-    for token, email in REDACTION_CACHE.items():
-        text = text.replace(token, email)
-    return text
-
-def clear_redaction_cache():
-    """Clear the redaction mapping"""
-    global REDACTION_CACHE
-    REDACTION_CACHE.clear()
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
+
+load_dotenv()  # load environment variables from .env
 
 class MCPClient:
-    def __init__(self):
+    def __init__(self, tool_catalog_ttl: Optional[float] = None):
         self.client = None
+        # Token -> email mapping for this client's conversations
+        self.redaction_vault = RedactionVault()
+        # Long-lived OpenAI client, created and warmed up at connect time
+        self.llm_client: Optional["AsyncOpenAI"] = None
+        # Per-server limit on concurrently executing tool calls
+        self.tool_call_limit = asyncio.Semaphore(int(os.getenv("MCP_MAX_CONCURRENT_TOOL_CALLS", "4")))
+        # OpenAI tools fetched at connect time, refreshed on tools/list_changed or TTL
+        if tool_catalog_ttl is None and os.getenv("TOOL_CATALOG_TTL"):
+            tool_catalog_ttl = float(os.environ["TOOL_CATALOG_TTL"])
+        self.tool_catalog = ToolCatalog(lambda: self.client.list_tools(), ttl_seconds=tool_catalog_ttl)
+        # Results of read-only/idempotent tools, shared by all queries of this client
+        self.tool_results = ToolResultCache()
+        # Spans of each query's LLM calls, tool calls, redaction and reconstruction (TRACE_LEVEL)
+        self.tracer = get_tracer()
+        # Conversation context of the latest query, for the stats line after each chat answer
+        self.last_context: Optional[ConversationContext] = None
+        # Prompt, cached and completion tokens of all LLM calls, printed with the stats
+        self.token_usage = TokenUsage()
     
-    async def process_query(self, query: str) -> str:
-        """Process a query using OpenAI and available tools"""
-        
-        api_key = os.environ["OPENAI_API_KEY"] 
-        # Initialize OpenAI client with your API key
-        client = AsyncOpenAI(api_key=api_key)
-        print("\n\n")
-        print(f"\033[1m**user query:**\033[0m {query}\n\n")
-        query = redact_emails_in_text(query)
-        print(f"\033[1m**user query redacted:**\033[0m {query}\n\n")
-        messages = [
-            {
-                "role": "user",
-                "content": query
-            }
-        ]
-        final_text = []
-        response = await self.client.list_tools()
-        available_tools = [{
-            "type": "function", 
-            "function": {
-                "name": tool.name,
-                "description": tool.description,
-                "parameters": tool.inputSchema
-            }
-        } for tool in response]
+    async def open_llm_client(self) -> None:
+        """Create the pooled OpenAI client shared by all queries and warm up its connection"""
+        if self.llm_client is None:
+            # Imports openai off the event loop, overlapping the MCP connection set-up
+            self.llm_client = await asyncio.to_thread(create_openai_client)
+        if warm_up_enabled():
+            await warm_up(self.llm_client)
 
+    async def process_query(self, query: str, vault: Optional[RedactionVault] = None,
+                            on_token: Optional[Callable[[str], None]] = None,
+                            deadline: Optional[Deadline] = None) -> str:
+        """Process a query using OpenAI and available tools
+
+        Args:
+            query: User query
+            vault: Redaction vault of the conversation, defaults to the client's own vault
+            on_token: When set, LLM responses are streamed and their reconstructed text
+                is passed to it as it arrives; tool calls start as soon as they are complete.
+                The returned text then lists only the tool calls, not the answer again
+            deadline: Deadline of the whole query, defaults to QUERY_TIMEOUT from now.
+                When it passes, the tool calls made so far are returned as a partial result
+        """
+        if vault is None:
+            vault = self.redaction_vault
+        if deadline is None:
+            deadline = Deadline.from_env()
         
-        print(f"\033[1m**sending user query to openapi llm to find if any mcp tool to use:**\033[0m {messages}\n\n")
-        response = await self.invoke_llm(client, available_tools, messages)
-        assistant_message = response.choices[0].message
-        
-        while assistant_message.tool_calls:
-            tool_calls = assistant_message.tool_calls
-            await self.invoke_tool(tool_calls, messages, final_text)
-            print(f"\033[1m**sending tools response to openapi llm:**\033[0m {messages}\n\n")
-            response = await self.invoke_llm(client, available_tools, messages)
-            print(f"\033[1m**openai llm response:**\033[0m {response}\n\n")
-            assistant_message = response.choices[0].message
+        # Reuse the client's pooled OpenAI connection across queries
+        if self.llm_client is None:
+            self.llm_client = create_openai_client()
+        client = self.llm_client
+        tracer = self.tracer
+        with tracer.span("query", query_chars=len(query), streamed=on_token is not None) as query_span:
+            tracer.debug("user_query", query=query)
+            with tracer.span("redaction", target="query", chars=len(query)):
+                query = redact_emails_in_text(query, vault)
+            tracer.debug("user_query_redacted", query=query)
+            # Stale tool outputs are compacted once the conversation exceeds its token budget.
+            # The static system prompt and sorted tools form a stable, cacheable prompt prefix
+            context = ConversationContext(system_messages() + [
+                {
+                    "role": "user",
+                    "content": query
+                }
+            ])
+            messages = context.messages
+            self.last_context = context
+            final_text = []
+            available_tools = await self.tool_catalog.get()
+
+            # Tool calls already dispatched while their LLM response was still streaming
+            pending: Dict[str, asyncio.Task] = {}
+            max_iterations = max_tool_iterations()
+            iterations = 0
+            try:
+                response = await self.invoke_llm(client, available_tools, messages, vault, on_token, pending, deadline)
+                assistant_message = response.choices[0].message
+
+                while assistant_message.tool_calls:
+                    iterations += 1
+                    if iterations > max_iterations:
+                        # Stop following tool requests and have the model answer from what it has so far
+                        for task in pending.values():
+                            task.cancel()
+                        pending.clear()
+                        tracer.event("max_tool_iterations", limit=max_iterations)
+                        response = await self.invoke_llm(client, available_tools, messages, vault, on_token, None, deadline,
+                                                         tool_choice="none")
+                        break
+                    tool_calls = assistant_message.tool_calls
+                    await self.invoke_tool(tool_calls, messages, final_text, vault, pending, deadline)
+                    pending.clear()
+                    context.compact()
+                    tracer.event("context", stats=context.stats)
+                    response = await self.invoke_llm(client, available_tools, messages, vault, on_token, pending, deadline)
+                    assistant_message = response.choices[0].message
+            except DeadlineExceeded as e:
+                # Return the partial result instead of holding the request open
+                tracer.event("deadline_exceeded", reason=str(e))
+                query_span.set(tool_rounds=iterations)
+                final_text.append(f"[Stopped early: {e}]")
+                return "\n".join(final_text)
 
-        response_content = reconstruct_emails_in_content(response.choices[0].message.content)
-        final_text.append(response_content)
+            answer = response.choices[0].message.content
+            with tracer.span("reconstruction", target="answer", chars=len(answer or "")):
+                response_content = reconstruct_emails_in_content(answer, vault)
+            if on_token is None:
+                final_text.append(response_content)
+            query_span.set(tool_rounds=iterations, vault=vault.stats, tool_cache=self.tool_results.stats)
 
         return "\n".join(final_text)
 
-    async def invoke_llm(self,  client: AsyncOpenAI,available_tools: list,messages: list) -> str:
-         return await client.chat.completions.create(
-                    model="gpt-4-turbo",
-                    max_tokens=1000,
-                    messages=messages,
-                    tools=available_tools
-                )
+    async def invoke_llm(self,  client: "AsyncOpenAI",available_tools: list,messages: list,
+                         vault: Optional[RedactionVault] = None,
+                         on_token: Optional[Callable[[str], None]] = None,
+                         pending: Optional[Dict[str, asyncio.Task]] = None,
+                         deadline: Optional[Deadline] = None,
+                         tool_choice: Optional[str] = None) -> str:
+        if deadline is None:
+            deadline = Deadline()
+        params = dict(
+            model="gpt-4-turbo",
+            max_tokens=1000,
+            messages=messages,
+            tools=available_tools
+        )
+        if tool_choice is not None:
+            params["tool_choice"] = tool_choice
+        # The request may take at most the time left until the query deadline
+        remaining = deadline.remaining()
+        if remaining is not None:
+            params["timeout"] = remaining
+        tracer = self.tracer
+        with tracer.span("llm_call", messages=len(messages), request_chars=lambda: payload_size(messages),
+                         streamed=on_token is not None, tool_choice=tool_choice) as span:
+            tracer.debug("llm_request", messages=messages)
+            if on_token is None:
+                response = await deadline.run(client.chat.completions.create(**params), "LLM call")
+            else:
+                response = await self.stream_llm(client, params, vault, on_token, pending, deadline, span)
+            message = response.choices[0].message
+            span.set(response_chars=len(message.content or ""), tool_calls=len(message.tool_calls or []),
+                     **self.token_usage.add(log_usage(response)))
+            tracer.debug("llm_response", response=response)
+        return response
+
+    async def stream_llm(self, client: "AsyncOpenAI", params: dict, vault: Optional[RedactionVault],
+                         on_token: Callable[[str], None], pending: Optional[Dict[str, asyncio.Task]],
+                         deadline: Deadline, span: Any) -> Any:
+        """Streamed variant of the LLM call, reconstructing emails in the text as it arrives"""
+        if vault is None:
+            vault = self.redaction_vault
+        # Tokens may be split across deltas, so reconstruct emails on the stream
+        reconstructor = StreamingReconstructor(vault)
+        timed = self.tracer.enabled()
+        reconstruction_time = 0.0
+
+        def on_text(delta: str) -> None:
+            nonlocal reconstruction_time
+            start = time.perf_counter() if timed else 0.0
+            text = reconstructor.feed(delta)
+            if timed:
+                reconstruction_time += time.perf_counter() - start
+            if text:
+                on_token(text)
+
+        def on_tool_call(tool_call: "ChatCompletionMessageToolCall") -> None:
+            # Start the MCP call while the model is still generating the rest of the response
+            self.tracer.event("tool_dispatched_early", tool=tool_call.function.name)
+            pending[tool_call.id] = asyncio.create_task(self.call_tool(tool_call, vault, deadline))
+
+        try:
+            response = await deadline.run(
+                stream_chat_completion(client, on_text, on_tool_call if pending is not None else None, **params),
+                "LLM call"
+            )
+        except BaseException:
+            for task in (pending or {}).values():
+                task.cancel()
+            raise
+        text = reconstructor.flush()
+        if text:
+            on_token(text)
+        # Reconstruction is interleaved with the stream, so it is reported as a total on the LLM span
+        span.set(reconstruction_ms=round(reconstruction_time * 1e3, 3))
+        return response
     
-    async def invoke_tool(self, tool_calls: Optional[List[ChatCompletionMessageToolCall]] ,messages: list,final_text:list) -> None:
+    async def invoke_tool(self, tool_calls: Optional[List["ChatCompletionMessageToolCall"]] ,messages: list,final_text:list, vault: Optional[RedactionVault] = None,
+                          pending: Optional[Dict[str, asyncio.Task]] = None,
+                          deadline: Optional[Deadline] = None) -> None:
+        if vault is None:
+            vault = self.redaction_vault
+        if pending is None:
+            pending = {}
         if tool_calls:
-            print(f"\033[1m**Going to call these mcp tool:**\033[0m {tool_calls} \n\n")
+            self.tracer.debug("tool_calls", tool_calls=tool_calls)
             messages.append({
                     "role": "assistant",
                     "content": '',
                     "tool_calls": tool_calls
             })
-            for tool_call in tool_calls:
-                print(f"\033[1m**Processing tool call:**\033[0m {tool_call}\n\n")
+            # Independent calls run concurrently; a failed call does not cancel its siblings
+            results = await asyncio.gather(
+                *(pending.get(tool_call.id) or self.call_tool(tool_call, vault, deadline) for tool_call in tool_calls),
+                return_exceptions=True
+            )
+            # Tool messages keep the order of the assistant's tool_calls
+            for tool_call, result in zip(tool_calls, results):
                 tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                print(f"\033[1m**redacted input args:**\033[0m {tool_args}\n\n")
-                tool_args = reconstruct_emails_in_content(tool_args)
-                print(f"\033[1m**reconstructed input args for sendint to mcp tool:**\033[0m {tool_args}\n\n")
-                # Execute tool call
-                result = await self.client.call_tool(tool_name, tool_args)
-                final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
-                print(f"\033[1m**mcp tool response:**\033[0m {result}\n\n")
-                #result.content = redact_emails(result.content)  # Redact emails in the tool response
-                result.content = [redact_emails_in_content(item) for item in result.content]
-                print(f"\033[1m**mcp tool response redacted:**\033[0m {result}\n\n")
-                
+                if isinstance(result, BaseException):
+                    self.tracer.event("tool_call_failed", tool=tool_name, error=repr(result))
+                    final_text.append(f"[Calling tool {tool_name} with args {tool_call.function.arguments} failed]")
+                    content = f"Error calling tool {tool_name}: {result}"
+                else:
+                    tool_args, content = result
+                    final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
                 messages.append({
                     "role": "tool",
                     "name": tool_name,
-                    "content": result.content,
+                    "content": content,
                     "tool_call_id": tool_call.id
                 })
 
+    async def call_tool(self, tool_call: "ChatCompletionMessageToolCall", vault: RedactionVault,
+                        deadline: Optional[Deadline] = None) -> tuple:
+        """Execute one tool call and return its (reconstructed args, redacted content)"""
+        if deadline is None:
+            deadline = Deadline()
+        tracer = self.tracer
+        tool_name = tool_call.function.name
+        with tracer.span("tool_call", tool=tool_name, args_chars=len(tool_call.function.arguments)) as span:
+            tool_args = json.loads(tool_call.function.arguments)
+            tracer.debug("tool_args_redacted", args=tool_args)
+            with tracer.span("reconstruction", target="tool_args"):
+                tool_args = reconstruct_emails_in_content(tool_args, vault, in_place=True)
+            tracer.debug("tool_args", args=tool_args)
+            tool = self.tool_catalog.tool(tool_name)
+            cacheable = self.tool_results.ttl_for(tool_name, tool) > 0
+            result = self.tool_results.get(tool_name, tool_args) if cacheable else None
+            span.set(cached=result is not None)
+            if result is None:
+                # Execute tool call, at most tool_call_limit at a time against this server
+                async with self.tool_call_limit:
+                    # The call may take at most the time left until the query deadline
+                    remaining = deadline.remaining()
+                    result = await deadline.run(
+                        self.client.call_tool(tool_name, tool_args, timeout=remaining),
+                        f"tool {tool_name}"
+                    )
+                cacheable = self.tool_results.put(tool_name, tool_args, result, tool)
+            tracer.debug("tool_result", result=result)
+            span.set(result_chars=lambda: payload_size(result.content), is_error=bool(getattr(result, "isError", False)))
+            # Cached results are shared across conversations, so redact a copy of them
+            with tracer.span("redaction", target="tool_result", items=len(result.content)):
+                content = redact_emails_in_content(result.content, vault, in_place=not cacheable)
+            tracer.debug("tool_result_redacted", content=content)
+        return tool_args, content
+
+    def print_stats(self) -> None:
+        """One line of cache and context counters; the payloads themselves are only traced"""
+        context = self.last_context.stats() if self.last_context is not None else {}
+        print(f"\033[1m**stats:**\033[0m vault {self.redaction_vault.stats()} | "
+              f"tool result cache {self.tool_results.stats()} | context {context} | "
+              f"openai usage {self.token_usage.stats()}")
+
     async def chat_loop(self):
         """Run an interactive chat loop"""
         print("\nMCP Client Started!")
@@ -178,20 +308,30 @@ class MCPClient:
                 if query.lower() == 'quit':
                     break
 
-                response = await self.process_query(query)
-                print("\033[1m**Final Response:**\033[0m \n" + response)
+                if streaming_enabled():
+                    # Answer tokens are shown as they arrive; only the tool calls are listed afterwards
+                    tool_summary = await self.process_query(query, on_token=lambda text: print(text, end="", flush=True))
+                    print()
+                    if tool_summary:
+                        print("\033[1m**Tool calls:**\033[0m \n" + tool_summary)
+                else:
+                    response = await self.process_query(query)
+                    print("\033[1m**Final Response:**\033[0m \n" + response)
+                self.print_stats()
 
             except Exception as e:
                 print(f"\nError: {str(e)}")
 
     async def cleanup(self):
         """Clean up resources"""
-        await self.exit_stack.aclose()
+        if self.llm_client is not None:
+            await self.llm_client.close()
+        self.tracer.close()
 
 async def main():
-    if len(sys.argv) < 2:
+    if len(sys.argv) < 2 or sys.argv[1] == startup.FLAG:
         #python mcp_client_http.py http://127.0.0.1:8000/mcp
-        print("Usage: python mcp_client.py <mcp server url>")
+        print(f"Usage: python mcp_client_http.py <mcp server url> [{startup.FLAG}]")
         sys.exit(1)
     
     config = {
@@ -204,16 +344,28 @@ async def main():
             }
         }
     }
-    client_obj = Client(config)
-    async with client_obj as connected_client:
-        await connected_client.ping()
-        tools = await connected_client.list_tools()
-        print(f"\nConnected to server with tools: {[tool.name for tool in tools]}")
-        
-        mcp_client = MCPClient()
-        mcp_client.client = connected_client
-        
-        await mcp_client.chat_loop()
+    # fastmcp is imported here, not at module load: it is the largest import of the client
+    from fastmcp import Client
+
+    mcp_client = MCPClient()
+    # Warm up the OpenAI connection while the MCP connection is set up
+    llm_ready = asyncio.create_task(mcp_client.open_llm_client())
+    client_obj = Client(config, message_handler=mcp_client.tool_catalog.handle_message)
+    try:
+        async with client_obj as connected_client:
+            await connected_client.ping()
+            mcp_client.client = connected_client
+            await mcp_client.tool_catalog.refresh()
+            print(f"\nConnected to server with tools: {mcp_client.tool_catalog.names}")
+            await llm_ready
+            startup.report("ready for the first query")
+            
+            await mcp_client.chat_loop()
+    finally:
+        # A failed connect must not leave the warm-up running (or its exception unretrieved)
+        llm_ready.cancel()
+        await asyncio.gather(llm_ready, return_exceptions=True)
+        await mcp_client.cleanup()
 
 if __name__ == "__main__":
     import sys
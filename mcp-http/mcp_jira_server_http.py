@@ -33,7 +33,7 @@ auth = RemoteAuthProvider(
 #mcp.auth = auth
 
 
-@mcp.tool(description="Get tickets assigned to a user from JIRA")
+@mcp.tool(description="Get tickets assigned to a user from JIRA", annotations={"readOnlyHint": True})
 def get_tickets_assigned_to_user(user_email: str) -> list:
     headers = get_http_headers()
     logging.info(f"headers received: {headers}")
@@ -68,7 +68,7 @@ def get_tickets_assigned_to_user(user_email: str) -> list:
     
     return real_tickets
 
-@mcp.tool(description="Get email ID from user ID")
+@mcp.tool(description="Get email ID from user ID", annotations={"readOnlyHint": True, "idempotentHint": True})
 def get_email_id_from_user_id(user_id: str) -> str:
     headers = get_http_headers()
     logging.info(f"headers received: {headers}")
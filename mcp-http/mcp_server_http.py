@@ -33,7 +33,7 @@ auth = RemoteAuthProvider(
 #mcp.auth = auth
 
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True})
 def get_tickets_assigned_to_user(user_email: str) -> list:
     headers = get_http_headers()
     logging.info(f"headers received: {headers}")
@@ -68,7 +68,7 @@ def get_tickets_assigned_to_user(user_email: str) -> list:
     
     return real_tickets
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True, "idempotentHint": True})
 def get_email_id_from_user_id(user_id: str) -> str:
     headers = get_http_headers()
     logging.info(f"headers received: {headers}")
@@ -86,7 +86,7 @@ def get_email_id_from_user_id(user_id: str) -> str:
     }
     return user_email_map.get(user_id, "satish.k@test.com")
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True})
 async def get_weather_alerts(state: str) -> str:
     """Get weather alerts for a German state.
 
@@ -54,7 +54,7 @@ async def collect_state_info(ctx: Context) -> str:
     else:
         return "Operation cancelled"
     
-@mcp.tool(description="Get weather alerts for a German state")
+@mcp.tool(description="Get weather alerts for a German state", annotations={"readOnlyHint": True})
 async def get_weather_alerts(state: str) -> str:
     """Get weather alerts for a German state.
 
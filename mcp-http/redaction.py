@@ -0,0 +1,414 @@
+import os
+import re
+import sys
+import time
+import abc
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+# Prefix of email tokens produced by generate_redaction_token
+TOKEN_PREFIX = "EAMIL_"
+TOKEN_DIGITS = 8
+# Well-known fallback key; anyone can recompute its tokens and confirm a guessed address
+PLACEHOLDER_HMAC_KEY = "your_app_specific_salt"
+HEX_DIGITS = frozenset('0123456789abcdef')
+# Characters of the variable-length values (addresses, bearer tokens) a stream may still be extending
+RUN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-@|~/=')
+# Longest run buffered while streaming; longer runs are flushed instead of buffered forever
+MAX_RUN_LENGTH = 4096
+# Trailing characters always buffered while redacting a stream; the longest fixed-shape match
+# (a 43-character Jira account id) has to fit
+STREAM_WINDOW = 64
+
+
+class PIIDetector(NamedTuple):
+    """One kind of PII: a regex without capturing groups and the prefix of its tokens"""
+    name: str
+    pattern: str
+    token_prefix: str
+
+
+DEFAULT_DETECTORS: Tuple[PIIDetector, ...] = (
+    # Only token-shaped credentials: 16+ characters with a digit or symbol, so "the bearer of this card" is left alone
+    PIIDetector("bearer", r'\b[Bb]earer\s+(?=[A-Za-z0-9\-._~+/]*[0-9\-._~+/])[A-Za-z0-9\-._~+/]{16,}=*', "BEARER_"),
+    PIIDetector("email", EMAIL_PATTERN.pattern, TOKEN_PREFIX),
+    # Jira Cloud account ids, e.g. 557058:f58131cb-b67d-43c7-b30d-6b58d40bd077
+    PIIDetector("jira_user", r'\b\d{6}:[0-9a-f]{8}(?:-[0-9a-f]{4}){3}-[0-9a-f]{12}\b', "JIRAUSER_"),
+    # (555) 123-4567, 555-123-4567 or 555 123 4567; dotted numbers only with a country code,
+    # since 123.456.7890 is as likely a version or an address
+    PIIDetector("phone", r'(?<![\w+.-])(?<!\d\.)(?:\+\d{1,3}[ .-]?(?:\(\d{3}\)|\d{3})[ .-]\d{3}[ .-]\d{4}'
+                         r'|(?:\(\d{3}\) ?|\d{3}[ -])\d{3}[ -]\d{4})(?![\w-]|\.\d)', "PHONE_"),
+)
+
+# Opt-in: legacy 24-hex Jira account ids (5b10a2844c20165700ede21f), which can't be told apart
+# from other hex ids such as build ids or MongoDB ObjectIds
+JIRA_LEGACY_USER_DETECTOR = PIIDetector("jira_legacy_user", r'\b[0-9a-f]{24}\b', "JIRAUSER_")
+
+
+
+class RedactionVault:
+    """Bounded token -> original value mapping owned by one client or conversation.
+
+    Entries are evicted least-recently-used first once ``max_entries`` or
+    ``max_bytes`` is exceeded, and expire ``ttl_seconds`` after their last
+    use. All operations are synchronous and guarded by a lock, so concurrent
+    conversations on one event loop (or worker threads) never observe a
+    half-updated vault.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: Optional[float] = 3600.0,
+                 max_bytes: int = 4 * 1024 * 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(token: str, email: str) -> int:
+        return sys.getsizeof(token) + sys.getsizeof(email)
+
+    def _expiry(self) -> float:
+        return float('inf') if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+
+    def _drop(self, token: str) -> None:
+        email, _ = self._entries.pop(token)
+        self.bytes_used -= self._entry_size(token, email)
+        self.evictions += 1
+
+    def put(self, token: str, email: str) -> None:
+        with self._lock:
+            if token in self._entries:
+                self.bytes_used -= self._entry_size(token, self._entries[token][0])
+            self._entries[token] = (email, self._expiry())
+            self._entries.move_to_end(token)
+            self.bytes_used += self._entry_size(token, email)
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            email, expires_at = entry
+            if expires_at <= self._clock():
+                self._drop(token)
+                self.misses += 1
+                return None
+            self._entries[token] = (email, self._expiry())
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return email
+
+    def purge_expired(self) -> int:
+        """Drop every expired entry and return how many were removed"""
+        with self._lock:
+            now = self._clock()
+            expired = [token for token, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for token in expired:
+                self._drop(token)
+            return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# Fallback vault for callers that do not own one
+DEFAULT_VAULT = RedactionVault()
+
+
+class PIIScanner:
+    """Redacts every configured PII kind in a single regex pass.
+
+    All detectors are compiled into one alternation of named groups, so the
+    text is scanned once and each match is replaced from a ``re.sub``
+    callback. Reconstruction likewise uses one pattern for all token shapes.
+    """
+
+    def __init__(self, detectors: Sequence[PIIDetector] = DEFAULT_DETECTORS):
+        self.detectors = tuple(detectors)
+        self.prefixes = {d.name: d.token_prefix for d in self.detectors}
+        self.pattern = re.compile('|'.join(f'(?P<{d.name}>{d.pattern})' for d in self.detectors))
+        self.token_prefixes = tuple(sorted(set(self.prefixes.values())))
+        self.token_pattern = re.compile(
+            '(?:' + '|'.join(re.escape(p) for p in self.token_prefixes) + ')' + f'[0-9a-f]{{{TOKEN_DIGITS}}}'
+        )
+        self.max_token_length = max(len(p) for p in self.token_prefixes) + TOKEN_DIGITS
+
+    def redact(self, text: str, vault: RedactionVault) -> str:
+        generate_token = get_token_generator()
+
+        def replace(match: re.Match) -> str:
+            value = match.group(0)
+            token = generate_token(value, self.prefixes[match.lastgroup])
+            vault.put(token, value)
+            return token
+
+        return self.pattern.sub(replace, text)
+
+    def reconstruct(self, text: str, vault: RedactionVault) -> str:
+        if not any(prefix in text for prefix in self.token_prefixes):
+            return text
+
+        def restore(match: re.Match) -> str:
+            token = match.group(0)
+            value = vault.get(token)
+            return token if value is None else value
+
+        return self.token_pattern.sub(restore, text)
+
+    def partial_token_start(self, text: str) -> int:
+        """Earliest index whose suffix is a proper prefix of some token"""
+        for start in range(max(0, len(text) - self.max_token_length + 1), len(text)):
+            tail = text[start:]
+            for prefix in self.token_prefixes:
+                head, digits = tail[:len(prefix)], tail[len(prefix):]
+                if prefix.startswith(head) and len(digits) < TOKEN_DIGITS and all(c in HEX_DIGITS for c in digits):
+                    return start
+        return len(text)
+
+    def partial_match_start(self, text: str) -> int:
+        """Index from which ``text`` could still turn into (or extend) a PII match"""
+        cut = max(0, len(text) - STREAM_WINDOW)
+        run_start = len(text)
+        while run_start > 0 and text[run_start - 1] in RUN_CHARS and len(text) - run_start < MAX_RUN_LENGTH:
+            run_start -= 1
+        cut = min(cut, run_start)
+        for match in self.pattern.finditer(text, max(0, cut - MAX_RUN_LENGTH)):
+            if match.start() < cut <= match.end():
+                cut = match.start()
+                break
+        return cut
+
+
+DEFAULT_SCANNER = PIIScanner()
+EMAIL_SCANNER = PIIScanner([d for d in DEFAULT_DETECTORS if d.name == "email"])
+
+class TokenGenerator:
+    """Keyed, memoized redaction token generation.
+
+    Tokens are a truncated HMAC-SHA256 of the value. The inner and outer
+    SHA-256 states over the padded key are computed once and copied per call
+    (the HMAC construction, without the ``hmac`` module's per-object overhead),
+    and recently seen values are served from a bounded memo so repeated
+    addresses are hashed only once.
+    """
+
+    def __init__(self, key: bytes, memo_size: int = 65_536):
+        block_size = hashlib.sha256().block_size
+        if len(key) > block_size:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(block_size, b'\0')
+        self._inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+        self._outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+        self._memo = lru_cache(maxsize=memo_size)(self._compute)
+
+    def _compute(self, value: str, prefix: str) -> str:
+        inner = self._inner.copy()
+        inner.update(value.encode())
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return f"{prefix}{outer.hexdigest()[:TOKEN_DIGITS]}"
+
+    def __call__(self, value: str, prefix: str = TOKEN_PREFIX) -> str:
+        return self._memo(value, prefix)
+
+    def cache_info(self):
+        return self._memo.cache_info()
+
+
+_token_generator: Optional[TokenGenerator] = None
+
+def get_token_generator() -> TokenGenerator:
+    """Process-wide generator, keyed from REDACTION_HMAC_KEY on first use.
+
+    Loaded lazily so a key from .env is picked up after load_dotenv() runs.
+    Without a key of its own the well-known placeholder is used and a
+    warning is logged, since its tokens don't hide who they stand for.
+    """
+    global _token_generator
+    if _token_generator is None:
+        key = os.environ.get("REDACTION_HMAC_KEY") or PLACEHOLDER_HMAC_KEY
+        if key == PLACEHOLDER_HMAC_KEY:
+            logger.warning("REDACTION_HMAC_KEY is not set to a secret of your own; redaction tokens use a "
+                           "well-known key, so a guessed address can be checked against its token")
+        _token_generator = TokenGenerator(key.encode())
+    return _token_generator
+
+def generate_redaction_token(value: str, prefix: str = TOKEN_PREFIX) -> str:
+    return get_token_generator()(value, prefix)
+
+def redact_emails_in_text(text: str, vault: Optional[RedactionVault] = None,
+                          scanner: Optional[PIIScanner] = None) -> str:
+    """Redact emails and the other PII kinds known to the scanner in one pass"""
+    if vault is None:
+        vault = DEFAULT_VAULT
+    return (DEFAULT_SCANNER if scanner is None else scanner).redact(text, vault)
+
+def _map_content(content: Any, transform_text: Callable[[str], str], in_place: bool) -> Any:
+    """Apply ``transform_text`` to every string leaf of ``content``.
+
+    Returns ``content`` itself when no leaf changed; otherwise only the
+    containers on the path to a changed leaf are copied (or, with
+    ``in_place``, updated where they are).
+    """
+    if hasattr(content, 'text') and hasattr(content, 'type'):
+        # Handle TextContent-like objects
+        text = transform_text(content.text)
+        if text is content.text:
+            return content
+        if in_place:
+            content.text = text
+            return content
+        if hasattr(content, 'model_copy'):
+            return content.model_copy(update={'text': text})
+        return type(content)(
+            type=content.type,
+            text=text,
+            annotations=getattr(content, 'annotations', None),
+            meta=getattr(content, 'meta', None)
+        )
+    elif isinstance(content, list):
+        result = content
+        for i, item in enumerate(content):
+            new_item = _map_content(item, transform_text, in_place)
+            if new_item is not item:
+                if result is content and not in_place:
+                    result = list(content)
+                result[i] = new_item
+        return result
+    elif isinstance(content, dict):
+        result = content
+        for k, v in content.items():
+            new_v = _map_content(v, transform_text, in_place)
+            if new_v is not v:
+                if result is content and not in_place:
+                    result = dict(content)
+                result[k] = new_v
+        return result
+    elif isinstance(content, str):
+        return transform_text(content)
+    else:
+        return content
+
+def redact_emails_in_content(content: Union[List, Dict, Any], vault: Optional[RedactionVault] = None,
+                             in_place: bool = False) -> Union[List, Dict, Any]:
+    """Redact every string in ``content``, sharing all unchanged objects.
+
+    Pass ``in_place=True`` for objects the caller owns (e.g. a fresh tool
+    result) to update them instead of copying the changed path.
+    """
+    return _map_content(content, lambda text: redact_emails_in_text(text, vault), in_place)
+
+def reconstruct_emails_in_content(content: Union[List, Dict, Any], vault: Optional[RedactionVault] = None,
+                                  in_place: bool = False) -> Union[List, Dict, Any]:
+    """Reconstruct every string in ``content``; see ``redact_emails_in_content``"""
+    return _map_content(content, lambda text: reconstruct_emails_in_text(text, vault), in_place)
+
+def reconstruct_emails_in_text(text: str, vault: Optional[RedactionVault] = None,
+                               scanner: Optional[PIIScanner] = None) -> str:
+    """Reconstruct emails in plain text.
+
+    Scans the text once for the token shape and looks each match up in the
+    vault, so the cost no longer grows with the number of cached tokens.
+    """
+    if not isinstance(text, str):
+        return text
+    if vault is None:
+        vault = DEFAULT_VAULT
+    return (DEFAULT_SCANNER if scanner is None else scanner).reconstruct(text, vault)
+
+def clear_redaction_cache(vault: Optional[RedactionVault] = None):
+    """Clear the redaction mapping"""
+    (DEFAULT_VAULT if vault is None else vault).clear()
+
+
+class StreamingTransformer(abc.ABC):
+    """Applies a whole-string redaction transform to text arriving in chunks.
+
+    ``feed`` returns everything that can no longer change and keeps back only
+    a short suffix that might still complete a match in a later chunk;
+    ``flush`` releases that suffix once the stream ends.
+    """
+
+    def __init__(self, vault: Optional[RedactionVault] = None, scanner: Optional[PIIScanner] = None):
+        self.vault = DEFAULT_VAULT if vault is None else vault
+        self.scanner = DEFAULT_SCANNER if scanner is None else scanner
+        self._pending = ""
+
+    @abc.abstractmethod
+    def transform(self, text: str) -> str:
+        """The transformed text of a piece that can no longer change"""
+
+    @abc.abstractmethod
+    def holdback_start(self, text: str) -> int:
+        """Index from which ``text`` may still be part of an incomplete match"""
+
+    def feed(self, chunk: str) -> str:
+        if not chunk:
+            return ""
+        text = self._pending + chunk
+        cut = self.holdback_start(text)
+        self._pending = text[cut:]
+        return self.transform(text[:cut]) if cut else ""
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return self.transform(text) if text else ""
+
+
+class StreamingReconstructor(StreamingTransformer):
+    """Restores redacted values in streamed LLM output without leaking split tokens"""
+
+    def transform(self, text: str) -> str:
+        return self.scanner.reconstruct(text, self.vault)
+
+    def holdback_start(self, text: str) -> int:
+        return self.scanner.partial_token_start(text)
+
+
+class StreamingRedactor(StreamingTransformer):
+    """Redacts streamed text even when a value spans chunks.
+
+    Unlike reconstruction, whose tokens have one fixed shape, the held-back
+    suffix is not minimal: Python's re can't tell whether a suffix could
+    still grow into a match, and phone numbers, Jira ids and "Bearer ..."
+    contain spaces, parentheses or colons, so the trailing run of address
+    characters alone doesn't cover them. The last STREAM_WINDOW characters,
+    enough for the longest of those shapes, are therefore always kept back
+    along with that run.
+    """
+
+    def transform(self, text: str) -> str:
+        return self.scanner.redact(text, self.vault)
+
+    def holdback_start(self, text: str) -> int:
+        return self.scanner.partial_match_start(text)
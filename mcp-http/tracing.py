@@ -0,0 +1,167 @@
+import os
+import sys
+import json
+import time
+import itertools
+import threading
+import contextvars
+from typing import Any, Dict, Optional, TextIO
+
+# Trace output; each can be overridden with the matching environment variable
+DEFAULT_TRACE_LEVEL = "off"  # TRACE_LEVEL: off, info (spans with durations and sizes) or debug (also payloads)
+# TRACE_FILE: append JSONL records to this file instead of printing to stderr
+
+OFF, INFO, DEBUG = 0, 1, 2
+LEVELS = {"off": OFF, "info": INFO, "debug": DEBUG}
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def _jsonable(value: Any) -> Any:
+    """JSON form of the pydantic objects (assistant messages, tool content) found in payloads"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def payload_size(payload: Any) -> int:
+    """Characters of a payload's JSON form; only called when tracing is on"""
+    if isinstance(payload, str):
+        return len(payload)
+    return len(json.dumps(payload, ensure_ascii=False, default=_jsonable))
+
+
+def _resolve(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    # Values may be zero-argument callables so that costly ones are only computed when traced
+    return {name: value() if callable(value) else value for name, value in attrs.items()}
+
+
+class _NoSpan:
+    """Span handed out when tracing is off: every operation is a no-op"""
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """One timed step (LLM call, tool call, redaction, reconstruction) of a query"""
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(_span_ids)
+        self.parent: Optional[Span] = None
+        self._start = 0.0
+        self._token = None
+
+    def set(self, **attrs: Any) -> None:
+        """Add attributes, e.g. the size of a result once it is known"""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        record = {"span": self.name, "id": self.id, "parent": self.parent.id if self.parent else None,
+                  "duration_ms": round(duration * 1e3, 3)}
+        record.update(_resolve(self.attrs))
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.tracer.emit(record)
+
+
+class Tracer:
+    """Leveled, structured tracing of the tool loop.
+
+    Spans record their duration and the attributes passed to them; payloads
+    are only attached at debug level. Nothing is formatted (and callable
+    attribute values are not even called) unless the level is enabled, so
+    with tracing off a step costs one comparison instead of the repr of the
+    whole conversation.
+
+    Args:
+        level: "off", "info" or "debug", defaults to TRACE_LEVEL
+        path: JSONL file to append records to, defaults to TRACE_FILE; stderr when unset
+    """
+
+    def __init__(self, level: Optional[str] = None, path: Optional[str] = None, stream: Optional[TextIO] = None):
+        if level is None:
+            level = os.getenv("TRACE_LEVEL", DEFAULT_TRACE_LEVEL)
+        if path is None:
+            path = os.getenv("TRACE_FILE") or None
+        self.level = LEVELS[level.lower()]
+        self.path = path
+        self._stream = stream
+        self._file = None
+        self._lock = threading.Lock()
+
+    def enabled(self, level: int = INFO) -> bool:
+        return self.level >= level
+
+    def span(self, name: str, **attrs: Any) -> Any:
+        if self.level < INFO:
+            return _NO_SPAN
+        return Span(self, name, attrs)
+
+    def event(self, name: str, level: int = INFO, **attrs: Any) -> None:
+        """Record a point-in-time event (limit reached, deadline passed, stats) inside the current span"""
+        if self.level < level:
+            return
+        parent = _current_span.get()
+        record = {"event": name, "parent": parent.id if parent else None}
+        record.update(_resolve(attrs))
+        self.emit(record)
+
+    def debug(self, name: str, **payloads: Any) -> None:
+        """Record payloads (messages, responses, tool results) at debug level only"""
+        self.event(name, DEBUG, **payloads)
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        record["ts"] = round(time.time(), 6)
+        if self.path:
+            line = json.dumps(record, ensure_ascii=False, default=_jsonable) + "\n"
+            with self._lock:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+            return
+        name = record.pop("span", None) or record.pop("event")
+        duration = record.pop("duration_ms", None)
+        record.pop("ts")
+        fields = " ".join(f"{key}={value}" for key, value in record.items() if value is not None)
+        timing = f" {duration:.1f} ms" if duration is not None else ""
+        print(f"\033[1m**trace {name}:**\033[0m{timing} {fields}", file=self._stream or sys.stderr)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from TRACE_LEVEL / TRACE_FILE on first use"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
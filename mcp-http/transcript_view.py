@@ -0,0 +1,459 @@
+import os
+import json
+import html
+import tempfile
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QPoint, QRectF, QSize, Qt, QTimer
+from PyQt5.QtGui import QAbstractTextDocumentLayout, QKeySequence, QPalette, QTextCharFormat, QTextCursor, QTextDocument
+from PyQt5.QtWidgets import QAbstractItemView, QApplication, QListView, QStyle, QStyledItemDelegate
+
+# Transcript defaults; each can be overridden with the matching environment variable
+DEFAULT_MAX_RESIDENT = 500  # TRANSCRIPT_MAX_RESIDENT (messages kept in memory, older ones are read back from disk)
+LOAD_OLDER_BATCH = 100      # messages read back from disk when scrolling past the top
+DOCUMENT_CACHE_SIZE = 64    # laid out documents kept for repainting the visible rows
+DEFAULT_FLUSH_INTERVAL_MS = 33  # TRANSCRIPT_FLUSH_MS (streamed text is rendered at most this often)
+STREAM_BLOCK_CHARS = 2000   # streamed lines are grouped into paragraphs of about this size
+
+MessageRole = Qt.UserRole + 1
+LINE_SEPARATOR = "\u2028"  # what a <br> becomes in a QTextDocument
+
+
+class TranscriptModel(QAbstractListModel):
+    """Chat messages of a session, the newest ``max_resident`` of them in memory.
+
+    Every finished message is appended to a temporary spool file, so the
+    rows dropped from the top to respect the cap can be read back when the
+    user scrolls up. Each message gets a sequence number that stays the
+    same while it moves in and out of memory, which is what the delegate
+    keys its caches on.
+
+    Args:
+        formatter: Builds the HTML of a finished message from (role, text)
+        max_resident: Messages kept in memory, defaults to TRANSCRIPT_MAX_RESIDENT
+    """
+
+    def __init__(self, formatter: Callable[[str, str], str], max_resident: Optional[int] = None, parent: Any = None):
+        super().__init__(parent)
+        if max_resident is None:
+            max_resident = int(os.getenv("TRANSCRIPT_MAX_RESIDENT", DEFAULT_MAX_RESIDENT))
+        self.formatter = formatter
+        self.max_resident = max(1, max_resident)
+        self.rows: List[Dict[str, Any]] = []
+        # File offset of every spooled message, indexed by sequence number
+        self._offsets: List[int] = []
+        self._spool = tempfile.TemporaryFile(mode="w+b")
+        self._next_seq = 0
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == MessageRole:
+            return row
+        if role == Qt.DisplayRole:
+            return row["text"]
+        return None
+
+    def html(self, row: Dict[str, Any]) -> str:
+        if row.get("html") is None:
+            row["html"] = self.formatter(row["role"], row["text"])
+        return row["html"]
+
+    @property
+    def streaming(self) -> bool:
+        return bool(self.rows) and self.rows[-1]["streaming"]
+
+    def append(self, role: str, text: str) -> None:
+        row = self._insert({"role": role, "text": text, "streaming": False, "html": None, "tail": ""})
+        self._spool_row(row)
+        self._trim()
+
+    def start_stream(self, text: str, html: str, tail: str) -> None:
+        """Add an assistant message that is still streaming, with the HTML of its finished lines and its last line"""
+        self._insert({"role": "assistant", "text": text, "streaming": True, "html": html, "tail": tail})
+        self._trim()
+
+    def extend_stream(self, text: str, html: str, tail: str) -> QModelIndex:
+        """Add streamed text to the message being streamed"""
+        row = self.rows[-1]
+        row["text"] += text
+        row.update(html=html, tail=tail)
+        index = self.index(len(self.rows) - 1)
+        self.dataChanged.emit(index, index)
+        return index
+
+    def finish_stream(self, text: str) -> QModelIndex:
+        """Replace the streamed text with the final answer"""
+        row = self.rows[-1]
+        row.update(text=text, streaming=False, html=None, tail="")
+        self._spool_row(row)
+        index = self.index(len(self.rows) - 1)
+        self.dataChanged.emit(index, index)
+        return index
+
+    def _insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row["seq"] = self._next_seq
+        self._next_seq += 1
+        position = len(self.rows)
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.append(row)
+        self.endInsertRows()
+        return row
+
+    def _spool_row(self, row: Dict[str, Any]) -> None:
+        self._spool.seek(0, os.SEEK_END)
+        # Sequence numbers are dense, but a streamed message is spooled after it has finished
+        while len(self._offsets) <= row["seq"]:
+            self._offsets.append(-1)
+        self._offsets[row["seq"]] = self._spool.tell()
+        record = {"seq": row["seq"], "role": row["role"], "text": row["text"]}
+        self._spool.write(json.dumps(record, ensure_ascii=False).encode() + b"\n")
+
+    def _trim(self) -> None:
+        excess = len(self.rows) - self.max_resident
+        if excess <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+        del self.rows[:excess]
+        self.endRemoveRows()
+
+    def has_older(self) -> bool:
+        return bool(self.rows) and self.rows[0]["seq"] > 0
+
+    def load_older(self, count: int = LOAD_OLDER_BATCH) -> int:
+        """Read up to ``count`` messages preceding the first resident one back from disk"""
+        if not self.has_older():
+            return 0
+        first = self.rows[0]["seq"]
+        older = []
+        for seq in range(max(0, first - count), first):
+            offset = self._offsets[seq]
+            if offset < 0:
+                continue
+            self._spool.seek(offset)
+            record = json.loads(self._spool.readline())
+            older.append({**record, "streaming": False, "html": None, "tail": ""})
+        if older:
+            self.beginInsertRows(QModelIndex(), 0, len(older) - 1)
+            self.rows[:0] = older
+            self.endInsertRows()
+        return len(older)
+
+    def plain_text(self, rows: List[int]) -> str:
+        return "\n\n".join(f"{self.rows[row]['role']}: {self.rows[row]['text']}" for row in sorted(rows))
+
+    def close(self) -> None:
+        self._spool.close()
+
+
+class MessageDelegate(QStyledItemDelegate):
+    """Paints a message's HTML with a QTextDocument, caching heights and laid out documents.
+
+    Heights are cached per (message, width), so appending a message or
+    repainting never lays out the other messages again; only resizing the
+    view does, and then only for rows the view asks about. The document of
+    the message being streamed is extended in place rather than laid out again.
+    """
+
+    PADDING = 6
+
+    def __init__(self, model: TranscriptModel, view: QListView):
+        super().__init__(view)
+        self.model = model
+        self._heights: Dict[int, tuple] = {}
+        self._documents: "OrderedDict[tuple, QTextDocument]" = OrderedDict()
+        # Where the unfinished last line of a streaming message starts in its document
+        self._tail_starts: Dict[int, int] = {}
+
+    def invalidate(self, seq: int) -> None:
+        self._heights.pop(seq, None)
+        self._tail_starts.pop(seq, None)
+        for key in [key for key in self._documents if key[0] == seq]:
+            del self._documents[key]
+
+    def document(self, row: Dict[str, Any], width: int) -> QTextDocument:
+        key = (row["seq"], width)
+        document = self._documents.get(key)
+        if document is None:
+            document = QTextDocument()
+            document.setDocumentMargin(0)
+            document.setHtml(self.model.html(row))
+            if row["streaming"]:
+                self._insert_tail(row["seq"], QTextCursor(document), row["tail"])
+            document.setTextWidth(width)
+            self._documents[key] = document
+            if len(self._documents) > DOCUMENT_CACHE_SIZE:
+                self._documents.popitem(last=False)
+        else:
+            self._documents.move_to_end(key)
+        return document
+
+    @staticmethod
+    def _insert_lines(cursor: QTextCursor, html: str) -> None:
+        # Inserting text lays out its whole paragraph again, so a long streamed answer is split into
+        # paragraphs of STREAM_BLOCK_CHARS, spaced like the <br> separated lines of the final answer.
+        # Each paragraph's height is rounded up to a pixel, so they are not made any smaller.
+        for number, line in enumerate(html.split("<br>")):
+            if number and cursor.block().length() < STREAM_BLOCK_CHARS:
+                cursor.insertText(LINE_SEPARATOR, QTextCharFormat())
+            elif number:
+                block = cursor.blockFormat()
+                bottom_margin = block.bottomMargin()
+                block.setBottomMargin(0)
+                cursor.setBlockFormat(block)
+                block.setTopMargin(0)
+                block.setBottomMargin(bottom_margin)
+                cursor.insertBlock(block, QTextCharFormat())
+            if line:
+                cursor.insertHtml(line)
+
+    def _insert_tail(self, seq: int, cursor: QTextCursor, html: str) -> None:
+        cursor.movePosition(QTextCursor.End)
+        self._tail_starts[seq] = cursor.position()
+        self._insert_lines(cursor, html)
+
+    def extend(self, row: Dict[str, Any], finished: str) -> bool:
+        """Add a streaming message's newly finished lines to its document and replace its last line.
+
+        Returns whether the message's height may have changed.
+        """
+        text_width = self._text_width(self.parent().viewport().width())
+        key = (row["seq"], text_width)
+        document = self._documents.get(key)
+        tail_start = self._tail_starts.get(row["seq"])
+        height = self._heights.get(row["seq"])
+        # Documents laid out for other widths are rebuilt from the row when next needed
+        self.invalidate(row["seq"])
+        if document is None or tail_start is None:
+            return True
+        cursor = QTextCursor(document)
+        cursor.setPosition(tail_start)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self._insert_lines(cursor, finished)
+        self._insert_tail(row["seq"], cursor, row["tail"])
+        self._documents[key] = document
+        self._heights[row["seq"]] = (text_width, int(document.size().height()) + 2 * self.PADDING)
+        return self._heights[row["seq"]] != height
+
+    def _text_width(self, width: int) -> int:
+        return max(1, width - 2 * self.PADDING)
+
+    def sizeHint(self, option: Any, index: QModelIndex) -> QSize:
+        # QListView passes no item rect to sizeHint, so rows are as wide as the viewport.
+        # Rows are read directly: index.data() would convert the row to and from a QVariant on every call
+        row = self.model.rows[index.row()]
+        width = self.parent().viewport().width()
+        text_width = self._text_width(width)
+        cached = self._heights.get(row["seq"])
+        if cached is None or cached[0] != text_width:
+            cached = (text_width, int(self.document(row, text_width).size().height()) + 2 * self.PADDING)
+            self._heights[row["seq"]] = cached
+        return QSize(width, cached[1])
+
+    def paint(self, painter: Any, option: Any, index: QModelIndex) -> None:
+        row = self.model.rows[index.row()]
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        document = self.document(row, self._text_width(self.parent().viewport().width()))
+        painter.save()
+        origin = option.rect.topLeft() + QPoint(self.PADDING, self.PADDING)
+        painter.translate(origin)
+        context = QAbstractTextDocumentLayout.PaintContext()
+        # Only draw the lines on screen, a long answer can be many screens tall
+        context.clip = QRectF(self.parent().viewport().rect().intersected(option.rect).translated(-origin))
+        context.palette.setColor(QPalette.Text, option.palette.color(QPalette.Text))
+        document.documentLayout().draw(painter, context)
+        painter.restore()
+
+
+class TranscriptView(QListView):
+    """Chat transcript that only lays out and paints the messages on screen.
+
+    Replaces an ever-growing QTextEdit, where every append re-laid out the
+    whole document. Older messages beyond the resident cap are read back
+    from disk when the user scrolls to the top.
+
+    Streamed text is buffered and rendered at most once per flush interval,
+    and only into the message being streamed: a line is rendered once, when
+    it is finished, and only the unfinished last line is rendered again.
+
+    Args:
+        formatter: Builds the HTML of a finished message from (role, text)
+        render_line: Renders one line of streamed text, e.g. MarkdownRenderer.convert; defaults to plain text
+        max_resident: Messages kept in memory, defaults to TRANSCRIPT_MAX_RESIDENT
+        flush_interval: Milliseconds between renders of streamed text, defaults to TRANSCRIPT_FLUSH_MS
+    """
+
+    def __init__(self, formatter: Callable[[str, str], str], render_line: Optional[Callable[[str], str]] = None,
+                 max_resident: Optional[int] = None, flush_interval: Optional[int] = None, parent: Any = None):
+        super().__init__(parent)
+        if flush_interval is None:
+            flush_interval = int(os.getenv("TRANSCRIPT_FLUSH_MS", DEFAULT_FLUSH_INTERVAL_MS))
+        self.render_line = render_line or plain_html
+        self.transcript = TranscriptModel(formatter, max_resident, self)
+        self.delegate = MessageDelegate(self.transcript, self)
+        self.setModel(self.transcript)
+        self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setResizeMode(QListView.Adjust)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.transcript.rowsAboutToBeRemoved.connect(self._on_rows_removed)
+        self._buffer: List[str] = []
+        self._renderer: Optional[StreamRenderer] = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(max(0, flush_interval))
+        self._flush_timer.timeout.connect(self._on_flush_timer)
+
+    def append(self, role: str, text: str) -> None:
+        self.flush()
+        if self.transcript.streaming:
+            # A stream cut off by a cancel or an error keeps what arrived as its final text
+            self.finish_stream(self.transcript.rows[-1]["text"])
+        self.transcript.append(role, text)
+        self.scrollToBottom()
+
+    def append_delta(self, text: str) -> None:
+        self._buffer.append(text)
+        if not self._flush_timer.isActive():
+            # Text after a pause is shown right away, what follows within the interval is coalesced
+            self.flush()
+            self._flush_timer.start()
+
+    def _on_flush_timer(self) -> None:
+        if self._buffer:
+            self.flush()
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Render the buffered streamed text into the message being streamed"""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        if not self.transcript.streaming:
+            self._renderer = StreamRenderer(self.render_line)
+            finished, tail = self._renderer.feed(text)
+            self.transcript.start_stream(text, message_html("assistant", self._renderer.html), tail)
+            self.scrollToBottom()
+            return
+        finished, tail = self._renderer.feed(text)
+        index = self.transcript.extend_stream(text, message_html("assistant", self._renderer.html), tail)
+        # Relaying out the rows is only needed when the text grew by a line; otherwise the row is just repainted
+        if self.delegate.extend(self.transcript.rows[-1], finished):
+            self.delegate.sizeHintChanged.emit(index)
+            self.scrollToBottom()
+
+    def finish_stream(self, text: str) -> None:
+        if self.transcript.streaming:
+            # The final answer replaces whatever is still buffered
+            self._buffer.clear()
+        else:
+            self.flush()
+        self._flush_timer.stop()
+        self._renderer = None
+        index = self.transcript.finish_stream(text)
+        self._changed(index)
+
+    @property
+    def streaming(self) -> bool:
+        return self.transcript.streaming or bool(self._buffer)
+
+    def _changed(self, index: QModelIndex) -> None:
+        # The row's height changes with its text, so drop its cached layout and let the view re-measure it
+        self.delegate.invalidate(self.transcript.rows[index.row()]["seq"])
+        self.delegate.sizeHintChanged.emit(index)
+        self.scrollToBottom()
+
+    def _on_rows_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        for row in self.transcript.rows[first:last + 1]:
+            self.delegate.invalidate(row["seq"])
+
+    def _on_scroll(self, value: int) -> None:
+        if value == 0 and self.transcript.has_older():
+            bar = self.verticalScrollBar()
+            before = bar.maximum()
+            if self.transcript.load_older():
+                self.doItemsLayout()
+                # Keep the message that was at the top in place
+                bar.setValue(bar.maximum() - before)
+
+    def keyPressEvent(self, event: Any) -> None:
+        if event.matches(QKeySequence.Copy):
+            rows = [index.row() for index in self.selectedIndexes()]
+            if rows:
+                QApplication.clipboard().setText(self.transcript.plain_text(rows))
+            return
+        super().keyPressEvent(event)
+
+    def close_transcript(self) -> None:
+        self._flush_timer.stop()
+        self.transcript.close()
+
+
+class StreamRenderer:
+    """Renders streamed text one line at a time as it arrives.
+
+    A line is rendered once, when its newline arrives; only the unfinished
+    last line is rendered again on every flush, so a flush costs the size of
+    the new text rather than of the whole message. Runs of blank lines are
+    collapsed the way markdown_to_html collapses them in the whole text.
+
+    Args:
+        render_line: Renders one line, e.g. MarkdownRenderer.convert
+    """
+
+    def __init__(self, render_line: Callable[[str], str]):
+        self.render_line = render_line
+        self.html = ""  # HTML of the finished lines
+        self._pending = ""
+        self._lines = 0
+        self._breaks = 0  # line breaks at the end of html
+
+    def _break(self) -> str:
+        # At most two line breaks in a row, i.e. a single blank line
+        if not self._lines or self._breaks >= 2:
+            return ""
+        self._breaks += 1
+        return "<br>"
+
+    def feed(self, text: str) -> Tuple[str, str]:
+        """Add streamed text; returns the HTML of the lines it finished and of the unfinished last line"""
+        *lines, self._pending = (self._pending + text).split("\n")
+        finished = []
+        for line in lines:
+            finished.append(self._break())
+            rendered = self.render_line(line)
+            if rendered:
+                finished.append(rendered)
+                self._breaks = 0
+            self._lines += 1
+        finished = "".join(finished)
+        self.html += finished
+        breaks = self._breaks
+        tail = self._break() + self.render_line(self._pending)
+        self._breaks = breaks
+        return finished, tail
+
+
+def message_html(role: str, body: str) -> str:
+    """Header and body of one message, in the colors the chat window has always used"""
+    prefix, color = {
+        "user": ("You:", "#0066cc"),
+        "assistant": ("Assistant:", "#009933"),
+        "system": ("System:", "#7B0D0D"),
+    }.get(role, ("Error:", "#cc0000"))
+    return f'<p><span style="color:{color};font-weight:bold;">{prefix}</span><br>{body}</p>'
+
+
+def plain_html(text: str) -> str:
+    """Text shown as typed, not interpreted as HTML"""
+    return html.escape(text).replace("\n", "<br>")
@@ -1,130 +1,50 @@
+# Profile imports when started with --profile-startup; this has to run before the imports below
+import startup
+startup.enable()
 import asyncio
-from typing import Optional, Any, Dict, List, Union
+from typing import TYPE_CHECKING, Optional, Dict, List
 from contextlib import AsyncExitStack
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
 from dotenv import load_dotenv
-import re
 import os
-import hashlib
-from openai import AsyncOpenAI
 import json
+import time
+from datetime import timedelta
 import sys
+import argparse
 
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QTextEdit, QLineEdit,
+    QApplication, QMainWindow, QLineEdit,
     QPushButton, QVBoxLayout, QWidget
 )
 from PyQt5.QtCore import pyqtSignal, QObject, QTimer
-from qasync import QEventLoop, asyncSlot, asyncClose
+from qasync import QEventLoop, asyncClose
 from PyQt5.QtWidgets import QDialog, QLabel, QLineEdit, QPushButton, QVBoxLayout
 
+from redaction import RedactionVault
+from tool_catalog import ToolCatalog
+from transcript_view import TranscriptView, message_html
+from markdown_html import MarkdownRenderer
+from tool_result_cache import ToolResultCache
+from conversation_context import ConversationContext
+from deadline import Deadline, DeadlineExceeded, max_tool_iterations
+from loop_guard import CpuOffload, LoopLagMonitor
+from cancellation import AbortedWork, cancellable, track_requests
+from tracing import get_tracer
+from llm_client import (
+    create_openai_client, warm_up, warm_up_enabled, stream_chat_completion, streaming_enabled,
+    system_messages, log_usage, TokenUsage
+)
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
+    from mcp import ClientSession
+
 load_dotenv()
 
-# [Previous utility functions remain exactly the same...]
-# Global cache for redaction mapping
-REDACTION_CACHE: Dict[str, str] = {}
-
-def generate_redaction_token(email: str) -> str:
-    salt = "your_app_specific_salt"
-    return f"EAMIL_{hashlib.sha256((salt + email).encode()).hexdigest()[:8]}"
-
-def redact_emails_in_text(text: str) -> str:
-    emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-    for email in emails:
-        token = generate_redaction_token(email)
-        REDACTION_CACHE[token] = email
-        text = text.replace(email, token)
-    return text
-
-def redact_emails_in_content(content: Union[List, Dict, Any]) -> Union[List, Dict, Any]:
-    if hasattr(content, 'text') and hasattr(content, 'type'):
-        # Handle TextContent-like objects
-        redacted_text = redact_emails_in_text(content.text)
-        return type(content)(
-            type=content.type,
-            text=redacted_text,
-            annotations=getattr(content, 'annotations', None),
-            meta=getattr(content, 'meta', None)
-        )
-    elif isinstance(content, list):
-        return [redact_emails_in_content(item) for item in content]
-    elif isinstance(content, dict):
-        return {k: redact_emails_in_content(v) for k, v in content.items()}
-    elif isinstance(content, str):
-        return redact_emails_in_text(content)
-    else:
-        return content
-    
-def reconstruct_emails_in_content(content: Union[List, Dict, Any]) -> Union[List, Dict, Any]:
-    if hasattr(content, 'text'):
-        reconstructed_text = reconstruct_emails_in_text(content.text)
-        return type(content)(
-            type=content.type,
-            text=reconstructed_text,
-            annotations=getattr(content, 'annotations', None),
-            meta=getattr(content, 'meta', None)
-        )
-    elif isinstance(content, list):
-        return [reconstruct_emails_in_content(item) for item in content]
-    elif isinstance(content, dict):
-        return {k: reconstruct_emails_in_content(v) for k, v in content.items()}
-    elif isinstance(content, str):
-        for token, email in REDACTION_CACHE.items():
-            content = content.replace(token, email)
-        return content
-    else:
-        return content
-
-def reconstruct_emails_in_text(text: str) -> str:
-    """Reconstruct emails in plain text"""
-    if not isinstance(text, str):
-        return text
-    for token, email in REDACTION_CACHE.items():
-        text = text.replace(token, email)
-    return text
-
-def clear_redaction_cache():
-    """Clear the redaction mapping"""
-    global REDACTION_CACHE
-    REDACTION_CACHE.clear()
-
-def markdown_to_html(text: str) -> str:
-    """Convert basic Markdown formatting to HTML for QTextEdit display"""
-    if not text:
-        return text
-    
-    # Convert **bold** to <strong>
-    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
-    
-    # Handle bullet points (•) - preserve as is with minimal spacing
-    text = re.sub(r'^• (.+)$', r'• \1', text, flags=re.MULTILINE)
-    
-    # Handle numbered lists - preserve as is
-    text = re.sub(r'^(\d+\.\s+.+)$', r'\1', text, flags=re.MULTILINE)
-    
-    # Handle dash bullet points
-    text = re.sub(r'^- (.+)$', r'• \1', text, flags=re.MULTILINE)
-    
-    # Replace line breaks with HTML line breaks, but preserve the original structure
-    # Don't add extra spacing - just convert \n to <br>
-    lines = text.split('\n')
-    html_lines = []
-    
-    for line in lines:
-        if line.strip():  # If line has content
-            html_lines.append(line)
-        else:  # Empty line - preserve as single line break
-            html_lines.append('')
-    
-    # Join with <br> tags to preserve original spacing
-    result = '<br>'.join(html_lines)
-    
-    # Clean up any excessive breaks (more than 2 consecutive)
-    result = re.sub(r'(<br>){3,}', '<br><br>', result)
-    
-    return result
+# Rendered answers are cached, so showing the same answer again costs a hash instead of a conversion
+markdown = MarkdownRenderer()
+markdown_to_html = markdown.render
 
 
 class MCPClient(QObject):
@@ -141,11 +61,27 @@ class MCPClient(QObject):
         self.connected = False
         self._shutting_down = False
         self.auth_token = auth_token
+        # Token -> email mapping for this window's conversation
+        self.redaction_vault = RedactionVault()
+        # Per-server limit on concurrently executing tool calls
+        self.tool_call_limit = asyncio.Semaphore(int(os.getenv("MCP_MAX_CONCURRENT_TOOL_CALLS", "4")))
+        # OpenAI tools fetched at connect time, refreshed on tools/list_changed or TTL
+        tool_catalog_ttl = float(os.environ["TOOL_CATALOG_TTL"]) if os.getenv("TOOL_CATALOG_TTL") else None
+        self.tool_catalog = ToolCatalog(lambda: self.session.list_tools(), ttl_seconds=tool_catalog_ttl)
+        # Results of read-only/idempotent tools, shared by all queries of this client
+        self.tool_results = ToolResultCache()
+        # Redaction, Markdown rendering and JSON decoding move to worker threads with UI_CPU_OFFLOAD=1
+        self.offload = CpuOffload()
+        # What cancelled queries and cut-off LLM/tool calls left unfinished
+        self.aborted = AbortedWork()
+        # Prompt, cached and completion tokens of all LLM calls, shown in the status bar
+        self.token_usage = TokenUsage()
 
     async def connect_to_server(self, server_script_path: str):
         if self._shutting_down:
             return False
             
+        llm_ready: Optional[asyncio.Task] = None
         try:
             self.status_update.emit("Connecting to server...")
             
@@ -159,6 +95,12 @@ class MCPClient(QObject):
                 "CONFIG_PATH": os.getenv("CONFIG_PATH", "/path/to/config"),
             }
             
+            # Warm up the OpenAI connection while the server process starts
+            llm_ready = asyncio.create_task(self.open_llm_client())
+            # Imported on first use so the login window comes up without waiting for mcp
+            from mcp import ClientSession, StdioServerParameters
+            from mcp.client.stdio import stdio_client
+
             command = "python" if is_python else "node"
             server_params = StdioServerParameters(
                 command=command,
@@ -168,79 +110,180 @@ class MCPClient(QObject):
 
             stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
             self.stdio, self.write = stdio_transport
-            self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+            self.session = await self.exit_stack.enter_async_context(
+                ClientSession(self.stdio, self.write, message_handler=self.tool_catalog.handle_message)
+            )
+            # Lets an aborted tool call tell the server to stop working on it
+            track_requests(self.session)
 
             await self.session.initialize()
 
-            response = await self.session.list_tools()
-            tools = response.tools
+            await self.tool_catalog.refresh()
+            await llm_ready
             #self.message_received.emit("system",f"User authenticated with token: {self.auth_token}")
-            self.message_received.emit("system", f"Successfully authenticated and connected to MCP server. Discovered tools: {[tool.name for tool in tools]}")
+            self.message_received.emit("system", f"Successfully authenticated and connected to MCP server. Discovered tools: {self.tool_catalog.names}")
             self.connected = True
             self.connection_ready.emit(True)
             self.status_update.emit("Ready")
             return True
             
         except Exception as e:
+            if llm_ready is not None:
+                # Don't leave the warm-up running (and its exception unretrieved) when the server can't be reached
+                llm_ready.cancel()
+                await asyncio.gather(llm_ready, return_exceptions=True)
             if not self._shutting_down:
                 self.message_received.emit("error", f"Connection failed: {str(e)}")
                 self.connection_ready.emit(False)
                 self.status_update.emit("Connection failed")
             return False
 
+    async def open_llm_client(self) -> None:
+        """Create the pooled OpenAI client shared by all queries and warm up its connection"""
+        if not self.client:
+            # Imports openai off the event loop, overlapping the MCP connection set-up
+            self.client = await asyncio.to_thread(create_openai_client)
+        if warm_up_enabled():
+            await warm_up(self.client)
+
     async def cleanup(self):
         self._shutting_down = True
         if hasattr(self, 'exit_stack'):
             await self.exit_stack.aclose()
+        if self.client:
+            await self.client.close()
+        self.offload.shutdown()
+        # Flushes and closes TRACE_FILE, which loop stall events are written to
+        get_tracer().close()
 
     async def process_query(self, query: str):
         """Process a query using OpenAI and available tools"""
+        started = time.perf_counter()
         try:
             self.message_received.emit("user", query)
             
             if not self.client:
-                self.client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
+                self.client = create_openai_client()
             
-            #query = redact_emails_in_text(query)
-            messages = [{"role": "user", "content": query}]
+            #query = redact_emails_in_text(query, self.redaction_vault)
+            # Stale tool outputs are compacted once the conversation exceeds its token budget
+            context = ConversationContext(system_messages() + [{"role": "user", "content": query}])
+            messages = context.messages
             
-            response = await self.session.list_tools()
-            available_tools = [{
-                "type": "function", 
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema
-                }
-            } for tool in response.tools]
-
-            response = await self.invoke_llm(self.client, available_tools, messages)
+            available_tools = await self.tool_catalog.get()
+
+            # Streamed text is emitted as "assistant_delta" until the final "assistant" message
+            stream = streaming_enabled()
+            # Tool calls already dispatched while their LLM response was still streaming
+            pending: Dict[str, asyncio.Task] = {}
+            # Bounds the whole tool loop; every LLM and tool step gets the time that is left
+            deadline = Deadline.from_env()
+            max_iterations = max_tool_iterations()
+            response = await self.invoke_llm(self.client, available_tools, messages, stream, pending, deadline)
             assistant_message = response.choices[0].message
             
+            iterations = 0
             while assistant_message.tool_calls:
+                iterations += 1
+                if iterations > max_iterations:
+                    # Stop following tool requests and have the model answer from what it has so far
+                    for task in pending.values():
+                        task.cancel()
+                    pending.clear()
+                    response = await self.invoke_llm(self.client, available_tools, messages, stream, None, deadline,
+                                                      tool_choice="none")
+                    break
                 tool_calls = assistant_message.tool_calls
-                await self.invoke_tool(tool_calls, messages, [])
-                response = await self.invoke_llm(self.client, available_tools, messages)
+                await self.invoke_tool(tool_calls, messages, [], pending, deadline)
+                pending.clear()
+                context.compact()
+                response = await self.invoke_llm(self.client, available_tools, messages, stream, pending, deadline)
                 assistant_message = response.choices[0].message
 
-            #response_content = reconstruct_emails_in_content(response.choices[0].message.content)
+            #response_content = reconstruct_emails_in_content(response.choices[0].message.content, self.redaction_vault)
             response_content = response.choices[0].message.content
+            # Renders the answer into the renderer's cache, so the transcript doesn't convert it on the Qt thread
+            await self.offload.run(markdown_to_html, response_content)
             self.message_received.emit("assistant", response_content)
+            stats = self.tool_results.stats()
+            usage = self.token_usage.stats()
+            self.status_update.emit(f"Tool result cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries | "
+                                    f"OpenAI tokens: {usage['prompt_tokens']} prompt ({usage['cached_tokens']} cached), "
+                                    f"{usage['completion_tokens']} completion")
             return True
-            
+
+        except DeadlineExceeded as e:
+            # Anything streamed so far stays on screen as the partial answer
+            self.error_occurred.emit(f"Stopped early: {e}")
+            return False
+        except asyncio.CancelledError:
+            # Cancelled from the window; in-flight LLM and tool calls have been aborted by now
+            self.aborted.queries += 1
+            self.aborted.seconds += time.perf_counter() - started
+            self.status_update.emit(f"Query cancelled. Aborted so far: {self.aborted.summary()}")
+            raise
         except Exception as e:
             self.error_occurred.emit(f"Error processing query: {str(e)}")
             return False
 
-    async def invoke_llm(self, client: AsyncOpenAI, available_tools: list, messages: list):
-        return await client.chat.completions.create(
+    async def invoke_llm(self, client: "AsyncOpenAI", available_tools: list, messages: list,
+                         stream: bool = False, pending: Optional[Dict[str, asyncio.Task]] = None,
+                         deadline: Optional[Deadline] = None, tool_choice: Optional[str] = None):
+        if deadline is None:
+            deadline = Deadline()
+        params = dict(
             model="gpt-4-turbo",
             max_tokens=1000,
             messages=messages,
             tools=available_tools
         )
+        if tool_choice is not None:
+            params["tool_choice"] = tool_choice
+        # The request may take at most the time left until the query deadline
+        remaining = deadline.remaining()
+        if remaining is not None:
+            params["timeout"] = remaining
+        if not stream:
+            try:
+                response = await deadline.run(client.chat.completions.create(**params), "LLM call")
+            except (asyncio.CancelledError, DeadlineExceeded):
+                self.aborted.llm_calls += 1
+                raise
+            self.token_usage.add(log_usage(response))
+            return response
+
+        streamed = 0
+
+        def on_text(delta: str) -> None:
+            nonlocal streamed
+            streamed += len(delta)
+            self.message_received.emit("assistant_delta", delta)
+
+        def on_tool_call(tool_call: "ChatCompletionMessageToolCall") -> None:
+            # Start the MCP call while the model is still generating the rest of the response
+            pending[tool_call.id] = asyncio.create_task(self.call_tool(tool_call, deadline))
+
+        try:
+            response = await deadline.run(
+                stream_chat_completion(client, on_text, on_tool_call if pending is not None else None, **params),
+                "LLM call"
+            )
+        except BaseException as e:
+            for task in (pending or {}).values():
+                task.cancel()
+            # Let the aborted tool calls notify their server before the error propagates
+            await asyncio.gather(*(pending or {}).values(), return_exceptions=True)
+            if isinstance(e, (asyncio.CancelledError, DeadlineExceeded)):
+                self.aborted.llm_calls += 1
+                self.aborted.streamed_chars += streamed
+            raise
+        self.token_usage.add(log_usage(response))
+        return response
     
-    async def invoke_tool(self, tool_calls: Optional[List[ChatCompletionMessageToolCall]], messages: list, final_text: list):
+    async def invoke_tool(self, tool_calls: Optional[List["ChatCompletionMessageToolCall"]], messages: list, final_text: list,
+                          pending: Optional[Dict[str, asyncio.Task]] = None, deadline: Optional[Deadline] = None):
+        if pending is None:
+            pending = {}
         if tool_calls:
             messages.append({
                 "role": "assistant",
@@ -248,29 +291,62 @@ class MCPClient(QObject):
                 "tool_calls": tool_calls
             })
             
-            for tool_call in tool_calls:
+            # Independent calls run concurrently; a failed call does not cancel its siblings
+            results = await asyncio.gather(
+                *(pending.get(tool_call.id) or self.call_tool(tool_call, deadline) for tool_call in tool_calls),
+                return_exceptions=True
+            )
+            # Tool messages keep the order of the assistant's tool_calls
+            for tool_call, result in zip(tool_calls, results):
                 tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                #tool_args = reconstruct_emails_in_content(tool_args)
-                
-                #self.message_received.emit("system", f"Calling tool {tool_name} with args {tool_args}")
-                
-                result = await self.session.call_tool(tool_name, tool_args)
-                #result.content = [redact_emails_in_content(item) for item in result.content]
-                
+                if isinstance(result, BaseException):
+                    content = f"Error calling tool {tool_name}: {result}"
+                else:
+                    content = result
                 messages.append({
                     "role": "tool",
                     "name": tool_name,
-                    "content": result.content,
+                    "content": content,
                     "tool_call_id": tool_call.id
                 })
 
+    async def call_tool(self, tool_call: "ChatCompletionMessageToolCall", deadline: Optional[Deadline] = None):
+        """Execute one tool call and return its redacted content"""
+        if deadline is None:
+            deadline = Deadline()
+        tool_name = tool_call.function.name
+        tool_args = await self.offload.run(json.loads, tool_call.function.arguments)
+        #tool_args = reconstruct_emails_in_content(tool_args, self.redaction_vault, in_place=True)
+        
+        #self.message_received.emit("system", f"Calling tool {tool_name} with args {tool_args}")
+        
+        tool = self.tool_catalog.tool(tool_name)
+        cacheable = self.tool_results.ttl_for(tool_name, tool) > 0
+        result = self.tool_results.get(tool_name, tool_args) if cacheable else None
+        if result is None:
+            async with self.tool_call_limit:
+                # The call may take at most the time left until the query deadline
+                remaining = deadline.remaining()
+                result = await deadline.run(
+                    cancellable(
+                        self.session.call_tool(tool_name, tool_args, read_timeout_seconds=timedelta(seconds=remaining) if remaining is not None else None),
+                        self.aborted
+                    ),
+                    f"tool {tool_name}"
+                )
+            cacheable = self.tool_results.put(tool_name, tool_args, result, tool)
+        # Cached results are shared across queries, so never redact them in place
+        #return redact_emails_in_content(result.content, self.redaction_vault, in_place=not cacheable)
+        return result.content
+
 class ChatWindow(QMainWindow):
     def __init__(self, server_script_path: str, auth_token: str):
         super().__init__()
         self.server_script_path = server_script_path
         self.auth_token = auth_token
         self._shutting_down = False
+        # The running query, cancelled by the Cancel button
+        self.query_task: Optional[asyncio.Task] = None
         self.init_ui()
         
         self.mcp_client = MCPClient(auth_token=self.auth_token, parent=self)
@@ -294,9 +370,8 @@ class ChatWindow(QMainWindow):
         # Layout
         layout = QVBoxLayout(central_widget)
         
-        # Chat display
-        self.chat_display = QTextEdit()
-        self.chat_display.setReadOnly(True)
+        # Chat display: a virtualized transcript, older messages beyond TRANSCRIPT_MAX_RESIDENT stay on disk
+        self.chat_display = TranscriptView(self.format_message, markdown.convert)
         layout.addWidget(self.chat_display)
         
         # Input area
@@ -310,6 +385,12 @@ class ChatWindow(QMainWindow):
         self.send_button.clicked.connect(self.on_send_clicked)
         layout.addWidget(self.send_button)
         
+        # Cancel button, enabled while a query runs
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.on_cancel_clicked)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+        
         # Status
         self.statusBar().showMessage("Initializing...")
         self.set_ui_enabled(False)
@@ -324,6 +405,7 @@ class ChatWindow(QMainWindow):
         self.set_ui_enabled(ready)
         if ready:
             self.statusBar().showMessage("Ready to chat")
+            startup.report("ready to chat")
         else:
             self.statusBar().showMessage("Connection failed")
 
@@ -336,9 +418,8 @@ class ChatWindow(QMainWindow):
             if not self._shutting_down:
                 self.display_message("error", f"Initialization error: {str(e)}")
 
-    @asyncSlot()
-    async def on_send_clicked(self):
-        if not self.mcp_client.connected:
+    def on_send_clicked(self):
+        if not self.mcp_client.connected or self.query_task is not None:
             return
             
         message = self.message_input.text().strip()
@@ -348,62 +429,58 @@ class ChatWindow(QMainWindow):
         self.message_input.clear()
         self.set_ui_enabled(False)
         
-        try:
-            await self.mcp_client.process_query(message)
-        except Exception as e:
-            self.display_message("error", f"Error processing message: {str(e)}")
-        finally:
-            if self.mcp_client.connected:
-                self.set_ui_enabled(True)
-                self.message_input.setFocus()
+        # The query runs as its own task so that Cancel can abort it
+        self.query_task = asyncio.ensure_future(self.mcp_client.process_query(message))
+        self.query_task.add_done_callback(self.on_query_done)
+        self.cancel_button.setEnabled(True)
+
+    def on_query_done(self, task: asyncio.Task):
+        if task is not self.query_task:
+            return  # Cancelled; the window was re-enabled when Cancel was clicked
+        self.query_task = None
+        self.cancel_button.setEnabled(False)
+        if not task.cancelled() and task.exception() is not None:
+            self.display_message("error", f"Error processing message: {str(task.exception())}")
+        if self.mcp_client.connected and not self._shutting_down:
+            self.set_ui_enabled(True)
+            self.message_input.setFocus()
+
+    def on_cancel_clicked(self):
+        """Abort the running query; its LLM stream is closed and its tool calls are cancelled on the server"""
+        task = self.query_task
+        if task is None:
+            return
+        self.query_task = None
+        task.cancel()
+        self.cancel_button.setEnabled(False)
+        self.display_message("system", "Query cancelled")
+        self.statusBar().showMessage("Cancelling...")
+        if self.mcp_client.connected:
+            self.set_ui_enabled(True)
+            self.message_input.setFocus()
 
     def set_ui_enabled(self, enabled: bool):
         """Enable or disable UI elements"""
         self.message_input.setEnabled(enabled)
         self.send_button.setEnabled(enabled)
 
+    def format_message(self, role: str, message: str) -> str:
+        """HTML of one finished transcript row; streamed text is rendered a line at a time by the view"""
+        body = markdown_to_html(message) if role == "assistant" else message
+        return message_html(role, body)
+
     def display_message(self, role: str, message: str):
-        """Thread-safe message display with proper spacing between messages"""
+        """Thread-safe message display; only the rows on screen are laid out"""
         if not self._shutting_down and hasattr(self, 'chat_display'):
             try:
-                cursor = self.chat_display.textCursor()
-                cursor.movePosition(cursor.End)
-                
-                # Add spacing between messages
-                if cursor.position() > 0:  # Only add spacing if not first message
-                    cursor.insertHtml('<br>')
-                
-                if role == "user":
-                    prefix = "You:"
-                    color = "#0066cc"
-                    # For user messages, just display as plain text
-                    cursor.insertHtml(f'<p><span style="color:{color};font-weight:bold;">{prefix}</span><br>{message}</p>')
-                elif role == "assistant":
-                    prefix = "Assistant:"
-                    color = "#009933"
-                    # For assistant messages, convert markdown to HTML for better formatting
-                    formatted_message = markdown_to_html(message)
-                    cursor.insertHtml(f'<p><span style="color:{color};font-weight:bold;">{prefix}</span><br>{formatted_message}</p>')
-                elif role == "system":
-                    prefix = "System:"
-                    color = "#7B0D0D"
-                    cursor.insertHtml(f'<p><span style="color:{color};font-weight:bold;">{prefix}</span><br>{message}</p>')
-                else:  # error
-                    prefix = "Error:"
-                    color = "#cc0000"
-                    cursor.insertHtml(f'<p><span style="color:{color};font-weight:bold;">{prefix}</span><br>{message}</p>')
-                
-                # Add extra spacing after system messages for better readability
-                #if role == "system":
-                cursor.insertHtml('<br>')
-                    
-                self.chat_display.setTextCursor(cursor)
-                self.chat_display.ensureCursorVisible()
-                
-                # Scroll to bottom
-                self.chat_display.verticalScrollBar().setValue(
-                    self.chat_display.verticalScrollBar().maximum()
-                )
+                if role == "assistant_delta":
+                    # Streamed tokens are buffered and rendered into the current assistant message at most every TRANSCRIPT_FLUSH_MS
+                    self.chat_display.append_delta(message)
+                elif role == "assistant" and self.chat_display.streaming:
+                    # Replace the streamed plain text with the formatted final answer
+                    self.chat_display.finish_stream(message)
+                else:
+                    self.chat_display.append(role, message)
             except RuntimeError:
                 pass  # Ignore if widget is already deleted
 
@@ -416,8 +493,11 @@ class ChatWindow(QMainWindow):
     async def closeEvent(self, event):
         """Clean up on window close"""
         self._shutting_down = True
+        if self.query_task is not None:
+            self.query_task.cancel()
         if hasattr(self, 'mcp_client'):
             await self.mcp_client.cleanup()
+        self.chat_display.close_transcript()
         event.accept()
 
 class LoginWindow(QDialog):
@@ -476,21 +556,34 @@ class LoginWindow(QDialog):
         self.statusBar().showMessage(message)  # If using status bar
         
 async def main():
+    parser = argparse.ArgumentParser(usage="python mcp_client_ui.py <path_to_server_script> [--profile-startup]")
+    parser.add_argument("server_script", help="Path to the server script (.py or .js)")
+    parser.add_argument(startup.FLAG, action="store_true",
+                        help="Print an import-time breakdown and the time until the client is ready for queries")
+    args = parser.parse_args()
+
     app = QApplication(sys.argv)
     loop = QEventLoop(app)
     asyncio.set_event_loop(loop)
     
+    # Load the client's heavy dependencies while the user logs in
+    startup.preload("mcp.client.stdio", "openai", "httpx")
     # Show login window first
     login = LoginWindow()
+    startup.mark("login window shown")
     if login.exec_() == QDialog.Accepted and login.token:
         token = login.token  # Store the token (you'll need to add this to LoginWindow)
         
         # Initialize chat window with token
-        window = ChatWindow(sys.argv[1], token)  # Pass token to ChatWindow
+        window = ChatWindow(args.server_script, token)  # Pass token to ChatWindow
         window.show()
         
+        # Logs every stall of the event loop over LOOP_LAG_THRESHOLD_MS with the coroutine that caused it
+        lag_monitor = LoopLagMonitor()
+        lag_monitor.start(loop)
         with loop:
             loop.run_forever()
+        lag_monitor.stop()
     else:
         sys.exit(0)  # Exit if login failed
 
@@ -13,7 +13,7 @@ config_path = os.getenv("CONFIG_PATH")
 logging.info(f"Server received API_KEY: {api_key}")
 logging.info(f"Server received config path: {config_path}")
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True})
 def get_tickets_assigned_to_user(user_email: str) -> list:
     """Get tickets assigned to a user from jira.
 
@@ -45,7 +45,7 @@ def get_tickets_assigned_to_user(user_email: str) -> list:
     
     return real_tickets
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True, "idempotentHint": True})
 def get_email_id_from_user_id(user_id: str) -> str:
     """Get email ID from user ID.
 
@@ -61,7 +61,7 @@ def get_email_id_from_user_id(user_id: str) -> str:
     }
     return user_email_map.get(user_id, "satish.k@test.com")
 
-@mcp.tool()
+@mcp.tool(annotations={"readOnlyHint": True})
 async def get_weather_alerts(state: str) -> str:
     """Get weather alerts for a German state.
 
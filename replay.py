@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+# Synthetic replay latencies; each can be overridden with the matching environment variable
+DEFAULT_LLM_LATENCY = 0.0    # REPLAY_LLM_LATENCY (seconds before a response or its first streamed chunk)
+DEFAULT_CHUNK_LATENCY = 0.0  # REPLAY_CHUNK_LATENCY (seconds between streamed chunks)
+DEFAULT_TOOL_LATENCY = 0.0   # REPLAY_TOOL_LATENCY (seconds per tool call)
+
+# Request fields that change from run to run without changing the answer
+VOLATILE_LLM_PARAMS = ("timeout",)
+
+
+class ReplayMiss(KeyError):
+    """Raised when a replayed request was never recorded"""
+
+
+def _jsonable(value: Any) -> Any:
+    """JSON form of the pydantic objects (assistant messages, tool content) found in requests"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return str(value)
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    payload = json.dumps([kind, request], sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_jsonable)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def llm_request(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: value for name, value in params.items() if name not in VOLATILE_LLM_PARAMS}
+
+
+class Cassette:
+    """Recorded request/response pairs of LLM calls and MCP calls, one JSON object per line.
+
+    While recording, every pair is appended and flushed as soon as it
+    completes. When replaying, a request is matched on a hash of its
+    canonical JSON; identical requests get their recorded responses in
+    order, and the last one again once those run out. Redaction tokens are
+    deterministic for a given REDACTION_HMAC_KEY, so a recording replays
+    as long as that key and the queries stay the same. Tool arguments and
+    results are stored unredacted, so treat recordings like the data itself.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.hits = 0
+        self.misses = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_recording(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        cassette._file = open(path, "w", encoding="utf-8")
+        return cassette
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        cassette = cls(path)
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    cassette.entries[entry["key"]].append(entry)
+        return cassette
+
+    def record(self, kind: str, request: Dict[str, Any], response: Any, elapsed: float) -> None:
+        entry = {"kind": kind, "key": request_key(kind, request), "request": request,
+                 "response": response, "elapsed_ms": round(elapsed * 1e3, 1)}
+        line = json.dumps(entry, ensure_ascii=False, default=_jsonable) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def lookup(self, kind: str, request: Dict[str, Any]) -> Any:
+        recorded = self.entries.get(request_key(kind, request))
+        if not recorded:
+            self.misses += 1
+            summary = json.dumps(request, ensure_ascii=False, default=_jsonable)[:200]
+            raise ReplayMiss(f"no recorded {kind} response in {self.path} for {summary}")
+        self.hits += 1
+        entry = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        return entry["response"]
+
+    def stats(self) -> dict:
+        return {"entries": sum(len(recorded) for recorded in self.entries.values()), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _Namespace:
+    def __init__(self, **attributes: Any):
+        self.__dict__.update(attributes)
+
+
+class RecordingLLMClient:
+    """AsyncOpenAI wrapper that records every chat completion it makes, streamed or not"""
+
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def with_options(self, **options: Any) -> Any:
+        return self._client.with_options(**options)
+
+    async def _create(self, **params: Any) -> Any:
+        start = time.perf_counter()
+        response = await self._client.chat.completions.create(**params)
+        if not params.get("stream"):
+            self._cassette.record("llm", llm_request(params), response.model_dump(mode="json"), time.perf_counter() - start)
+            return response
+        return self._record_stream(response, params, start)
+
+    async def _record_stream(self, stream: Any, params: Dict[str, Any], start: float) -> AsyncIterator[Any]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk.model_dump(mode="json"))
+            yield chunk
+        self._cassette.record("llm", llm_request(params), chunks, time.perf_counter() - start)
+
+
+class ReplayLLMClient:
+    """Stands in for AsyncOpenAI, answering chat completions from a Cassette.
+
+    Args:
+        cassette: Recording to serve responses from
+        latency: Seconds before each response (or its first streamed chunk), defaults to REPLAY_LLM_LATENCY
+        chunk_latency: Seconds between streamed chunks, defaults to REPLAY_CHUNK_LATENCY
+    """
+
+    def __init__(self, cassette: Cassette, latency: Optional[float] = None, chunk_latency: Optional[float] = None):
+        if latency is None:
+            latency = float(os.getenv("REPLAY_LLM_LATENCY", DEFAULT_LLM_LATENCY))
+        if chunk_latency is None:
+            chunk_latency = float(os.getenv("REPLAY_CHUNK_LATENCY", DEFAULT_CHUNK_LATENCY))
+        self.cassette = cassette
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.chat = _Namespace(completions=_Namespace(create=self._create))
+        self.models = _Namespace(list=self._list_models)
+
+    def with_options(self, **options: Any) -> "ReplayLLMClient":
+        return self
+
+    async def _list_models(self) -> list:
+        return []
+
+    async def _create(self, **params: Any) -> Any:
+        from openai.types.chat import ChatCompletion
+
+        response = self.cassette.lookup("llm", llm_request(params))
+        if params.get("stream"):
+            return self._replay_stream(response)
+        await asyncio.sleep(self.latency)
+        return ChatCompletion.model_validate(response)
+
+    async def _replay_stream(self, chunks: list) -> AsyncIterator[Any]:
+        from openai.types.chat import ChatCompletionChunk
+
+        await asyncio.sleep(self.latency)
+        for index, chunk in enumerate(chunks):
+            if index and self.chunk_latency:
+                await asyncio.sleep(self.chunk_latency)
+            yield ChatCompletionChunk.model_validate(chunk)
+
+    async def close(self) -> None:
+        pass
+
+
+class RecordingSession:
+    """MCP session wrapper that records tool calls and tool listings"""
+
+    def __init__(self, session: Any, cassette: Cassette):
+        self._session = session
+        self._cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = await self._session.call_tool(name, arguments, *args, **kwargs)
+        self._cassette.record("tool", {"name": name, "arguments": arguments},
+                              result.model_dump(mode="json", by_alias=True), time.perf_counter() - start)
+        return result
+
+    async def list_tools(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = await self._session.list_tools(*args, **kwargs)
+        self._cassette.record("list_tools", {}, result.model_dump(mode="json", by_alias=True), time.perf_counter() - start)
+        return result
+
+
+class ReplaySession:
+    """Stands in for an MCP ClientSession, answering tool calls from a Cassette.
+
+    Args:
+        cassette: Recording to serve results from
+        latency: Seconds per tool call, defaults to REPLAY_TOOL_LATENCY
+    """
+
+    def __init__(self, cassette: Cassette, latency: Optional[float] = None):
+        if latency is None:
+            latency = float(os.getenv("REPLAY_TOOL_LATENCY", DEFAULT_TOOL_LATENCY))
+        self.cassette = cassette
+        self.latency = latency
+
+    async def initialize(self) -> None:
+        pass
+
+    async def send_ping(self) -> None:
+        pass
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None, *args: Any, **kwargs: Any) -> Any:
+        from mcp.types import CallToolResult
+
+        result = self.cassette.lookup("tool", {"name": name, "arguments": arguments})
+        await asyncio.sleep(self.latency)
+        return CallToolResult.model_validate(result)
+
+    async def list_tools(self, *args: Any, **kwargs: Any) -> Any:
+        from mcp.types import ListToolsResult
+
+        return ListToolsResult.model_validate(self.cassette.lookup("list_tools", {}))
+
+
+def replay_clients(path: str) -> Tuple[Cassette, ReplaySession, ReplayLLMClient]:
+    """Cassette loaded from ``path`` with the session and LLM client that replay it"""
+    cassette = Cassette.load(path)
+    return cassette, ReplaySession(cassette), ReplayLLMClient(cassette)
@@ -0,0 +1,134 @@
+"""Resident MCP server daemon on a Unix domain socket.
+
+The daemon imports a FastMCP server script once and then serves every client
+that connects to its socket with its own MCP session, so a client start skips
+the interpreter spawn and the server's heavy imports. Messages are the same
+newline-delimited JSON-RPC as the stdio transport.
+
+usage: python server_daemon.py ./mcp_server.py [--socket PATH]
+clients: python mcp_client.py ./mcp_server.py --daemon-socket PATH (or MCP_DAEMON_SOCKET=PATH)
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import tempfile
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Any
+
+import anyio
+from anyio.streams.buffered import BufferedByteReceiveStream
+import mcp.types as types
+from mcp.shared.message import SessionMessage
+
+# Largest single JSON-RPC message accepted on the socket
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def default_socket_path() -> str:
+    return os.getenv("MCP_DAEMON_SOCKET") or os.path.join(tempfile.gettempdir(), f"mcp_server_{os.getuid()}.sock")
+
+
+@asynccontextmanager
+async def socket_streams(stream: anyio.abc.ByteStream):
+    """MCP read/write streams over a newline-delimited JSON-RPC byte stream (as stdio_server does for stdio)"""
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    buffered = BufferedByteReceiveStream(stream)
+
+    async def socket_reader():
+        async with read_stream_writer:
+            while True:
+                try:
+                    line = await buffered.receive_until(b"\n", MAX_MESSAGE_BYTES)
+                except (anyio.EndOfStream, anyio.IncompleteRead, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    return
+                try:
+                    message = types.JSONRPCMessage.model_validate_json(line)
+                except Exception as exc:
+                    await read_stream_writer.send(exc)
+                    continue
+                await read_stream_writer.send(SessionMessage(message))
+
+    async def socket_writer():
+        try:
+            async with write_stream_reader:
+                async for session_message in write_stream_reader:
+                    json = session_message.message.model_dump_json(by_alias=True, exclude_none=True)
+                    await stream.send(json.encode() + b"\n")
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(socket_reader)
+        tg.start_soon(socket_writer)
+        try:
+            yield read_stream, write_stream
+        finally:
+            tg.cancel_scope.cancel()
+
+
+@asynccontextmanager
+async def unix_socket_client(socket_path: str):
+    """Client transport attaching to a running daemon; drop-in for stdio_client"""
+    stream = await anyio.connect_unix(socket_path)
+    async with stream, socket_streams(stream) as (read_stream, write_stream):
+        yield read_stream, write_stream
+
+
+def load_server(script_path: str) -> Any:
+    """Import a server script without running it and return its FastMCP instance (``mcp``)"""
+    spec = importlib.util.spec_from_file_location("mcp_daemon_server", os.path.abspath(script_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.mcp
+
+
+async def serve(script_path: str, socket_path: str) -> None:
+    from mcp.server.lowlevel import NotificationOptions
+
+    start = time.perf_counter()
+    server = load_server(script_path)._mcp_server
+    print(f"Loaded {script_path} in {(time.perf_counter() - start) * 1e3:.0f} ms", file=sys.stderr)
+
+    async def handle(stream: anyio.abc.ByteStream) -> None:
+        async with stream, socket_streams(stream) as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options(NotificationOptions(tools_changed=True)),
+            )
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    # Only the owning user may attach: the socket is created 0600, with no window where others could connect
+    umask = os.umask(0o177)
+    try:
+        listener = await anyio.create_unix_listener(socket_path)
+    finally:
+        os.umask(umask)
+    print(f"MCP server daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        await listener.serve(handle)
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python server_daemon.py <path_to_server_script> [--socket PATH]")
+    parser.add_argument("server_script", help="FastMCP server script defining a module-level `mcp`")
+    parser.add_argument("--socket", default=default_socket_path(), help="Unix domain socket to listen on")
+    args = parser.parse_args()
+    # Exit through the finally blocks on `kill` too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        anyio.run(serve, args.server_script, args.socket)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
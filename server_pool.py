@@ -0,0 +1,207 @@
+import os
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+logger = logging.getLogger(__name__)
+
+# Pool defaults; each can be overridden with the matching environment variable
+DEFAULT_POOL_SIZE = 1                 # MCP_SERVER_POOL_SIZE
+DEFAULT_HEALTH_CHECK_INTERVAL = 15.0  # MCP_POOL_HEALTH_CHECK_INTERVAL (seconds, 0 disables)
+DEFAULT_PING_TIMEOUT = 5.0            # MCP_POOL_PING_TIMEOUT (seconds)
+
+
+def pool_size_from_env() -> int:
+    return int(os.getenv("MCP_SERVER_POOL_SIZE", DEFAULT_POOL_SIZE))
+
+
+class PoolWorker:
+    """One stdio server process and its ClientSession.
+
+    The stdio transport and session are entered and exited inside the
+    worker's own task, as anyio requires, so a worker can be stopped and
+    replaced from anywhere without tearing down the others.
+    """
+
+    def __init__(self, index: int, server_params: StdioServerParameters, message_handler: Optional[Callable] = None):
+        self.index = index
+        self.server_params = server_params
+        self.message_handler = message_handler
+        self.session: Optional[ClientSession] = None
+        self.outstanding = 0
+        self.calls = 0
+        self.alive = False
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"mcp-pool-worker-{self.index}")
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            async with stdio_client(self.server_params) as (read, write):
+                async with ClientSession(read, write, message_handler=self.message_handler) as session:
+                    await session.initialize()
+                    self.session = session
+                    self.alive = True
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning(f"MCP pool worker {self.index} stopped: {e}")
+        finally:
+            self.alive = False
+            self._ready.set()
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"MCP pool worker {self.index} failed its health check: {e!r}")
+            return False
+
+    async def stop(self) -> None:
+        self.alive = False
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+
+
+class StdioServerPool:
+    """N stdio MCP server processes behind the ClientSession calls MCPClient uses.
+
+    Each tool call goes to the live worker with the fewest outstanding
+    requests, so blocking or CPU-bound tools run in parallel processes
+    instead of queueing behind one interpreter. A background task pings
+    every worker and replaces the ones that died or stopped answering;
+    a worker whose call fails with a transport error is checked at once.
+
+    Args:
+        server_params: How to start one server process
+        size: Number of server processes
+        message_handler: Passed to every worker's ClientSession
+        health_check_interval: Seconds between health checks, 0 to disable
+    """
+
+    def __init__(self, server_params: StdioServerParameters, size: Optional[int] = None,
+                 message_handler: Optional[Callable] = None, health_check_interval: Optional[float] = None,
+                 ping_timeout: Optional[float] = None):
+        if size is None:
+            size = pool_size_from_env()
+        if health_check_interval is None:
+            health_check_interval = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", DEFAULT_HEALTH_CHECK_INTERVAL))
+        if ping_timeout is None:
+            ping_timeout = float(os.getenv("MCP_POOL_PING_TIMEOUT", DEFAULT_PING_TIMEOUT))
+        self.server_params = server_params
+        self.size = max(1, size)
+        self.message_handler = message_handler
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.workers: List[PoolWorker] = []
+        self.respawns = 0
+        self._respawn_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._checks: set = set()
+
+    def _new_worker(self, index: int) -> PoolWorker:
+        return PoolWorker(index, self.server_params, self.message_handler)
+
+    async def start(self) -> None:
+        """Start all server processes concurrently and the health checker"""
+        self.workers = [self._new_worker(index) for index in range(self.size)]
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+        if self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-pool-health")
+
+    def _pick(self) -> PoolWorker:
+        """Live worker with the fewest outstanding requests, ties going to the least used one"""
+        live = [worker for worker in self.workers if worker.alive]
+        if not live:
+            raise RuntimeError("No live MCP server process in the pool")
+        return min(live, key=lambda worker: (worker.outstanding, worker.calls))
+
+    async def _dispatch(self, call: Callable[[ClientSession], Awaitable[Any]]) -> Any:
+        worker = self._pick()
+        worker.outstanding += 1
+        worker.calls += 1
+        try:
+            return await call(worker.session)
+        except Exception as e:
+            # Tool errors come back as results; an exception here may mean the process is gone
+            if not isinstance(e, asyncio.TimeoutError):
+                check = asyncio.create_task(self._check(worker))
+                self._checks.add(check)
+                check.add_done_callback(self._checks.discard)
+            raise
+        finally:
+            worker.outstanding -= 1
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None,
+                        read_timeout_seconds: Optional[timedelta] = None, **kwargs: Any) -> Any:
+        return await self._dispatch(
+            lambda session: session.call_tool(name, arguments, read_timeout_seconds=read_timeout_seconds, **kwargs)
+        )
+
+    async def list_tools(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._dispatch(lambda session: session.list_tools(*args, **kwargs))
+
+    async def send_ping(self) -> Any:
+        return await self._dispatch(lambda session: session.send_ping())
+
+    async def _check(self, worker: PoolWorker) -> None:
+        """Replace a worker that is dead or does not answer a ping"""
+        if await worker.ping(self.ping_timeout):
+            return
+        async with self._respawn_lock:
+            if worker not in self.workers:
+                return
+            await worker.stop()
+            replacement = self._new_worker(worker.index)
+            self.workers[self.workers.index(worker)] = replacement
+            try:
+                await replacement.start()
+                self.respawns += 1
+                logger.warning(f"Respawned MCP pool worker {worker.index}")
+            except Exception as e:
+                logger.warning(f"Could not respawn MCP pool worker {worker.index}: {e}")
+
+    async def health_check(self) -> None:
+        await asyncio.gather(*(self._check(worker) for worker in list(self.workers)))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.health_check()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self.workers),
+            "alive": sum(worker.alive for worker in self.workers),
+            "outstanding": [worker.outstanding for worker in self.workers],
+            "calls": [worker.calls for worker in self.workers],
+            "respawns": self.respawns,
+        }
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import threading
+import importlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Kept free of third-party imports: it has to be loaded before everything it measures
+
+FLAG = "--profile-startup"
+TOP_PACKAGES = 12
+
+_profiler: Optional["ImportProfiler"] = None
+_started = time.perf_counter()
+_milestones: List[Tuple[str, float]] = []
+_reported = False
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was started (Linux only), which includes interpreter startup"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _TimedLoader:
+    """Wraps a module's loader for the duration of its import and times create/exec"""
+
+    def __init__(self, loader: Any, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        self._profiler.enter(spec.name)
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._profiler.exit()
+
+    def exec_module(self, module: Any) -> None:
+        self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exit()
+            # Leave no trace of the wrapper on the imported module
+            if getattr(module, "__spec__", None) is not None and module.__spec__.loader is self:
+                module.__spec__.loader = self._loader
+            if getattr(module, "__loader__", None) is self:
+                module.__loader__ = self._loader
+
+
+class ImportProfiler:
+    """Meta path finder recording the self and cumulative import time of every module.
+
+    The same numbers ``python -X importtime`` prints, gathered in-process so
+    they can be summarized per top-level package next to time-to-ready.
+    """
+
+    def __init__(self):
+        self.self_times: Dict[str, float] = defaultdict(float)
+        self.cumulative: Dict[str, float] = defaultdict(float)
+        self._local = threading.local()
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self, name: str) -> None:
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self) -> None:
+        stack = self._local.stack
+        name, start, children = stack.pop()
+        total = time.perf_counter() - start
+        self.self_times[name] += total - children
+        self.cumulative[name] += total
+        if stack:
+            stack[-1][2] += total
+
+    def by_package(self) -> List[Tuple[str, float, int]]:
+        """(top-level package, self time, module count), slowest first"""
+        packages: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        for name, seconds in self.self_times.items():
+            entry = packages[name.partition(".")[0]]
+            entry[0] += seconds
+            entry[1] += 1
+        return sorted(((name, t, n) for name, (t, n) in packages.items()), key=lambda p: p[1], reverse=True)
+
+
+def enable(argv: Optional[List[str]] = None) -> bool:
+    """Start profiling imports if ``--profile-startup`` is on the command line (or PROFILE_STARTUP=1).
+
+    Call it from an entry point before its other imports.
+    """
+    global _profiler
+    argv = sys.argv if argv is None else argv
+    if _profiler is None and (FLAG in argv or os.getenv("PROFILE_STARTUP", "0").lower() in ("1", "true", "yes")):
+        _profiler = ImportProfiler()
+        sys.meta_path.insert(0, _profiler)
+    return _profiler is not None
+
+
+def enabled() -> bool:
+    return _profiler is not None
+
+
+def mark(label: str) -> None:
+    """Record a startup milestone such as the window being shown"""
+    if _profiler is not None:
+        _milestones.append((label, time.perf_counter()))
+
+
+def preload(*modules: str) -> threading.Thread:
+    """Import modules in a background thread, e.g. while a login dialog waits for the user.
+
+    Lazy imports of the same modules later find them in ``sys.modules``.
+    Import errors are left for the code that really needs the module to raise.
+    """
+    def run() -> None:
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name="preload-imports", daemon=True)
+    thread.start()
+    return thread
+
+
+def report(label: str = "ready", file: Any = None) -> None:
+    """Print the import-time breakdown and time-to-ready to stderr, once"""
+    global _reported
+    if _profiler is None or _reported:
+        return
+    _reported = True
+    mark(label)
+    file = file or sys.stderr
+    sys.meta_path.remove(_profiler)
+
+    packages = _profiler.by_package()
+    total = sum(seconds for _, seconds, _ in packages)
+    print(f"\n\033[1m**startup profile:**\033[0m {len(_profiler.self_times)} modules imported in {total * 1e3:.0f} ms", file=file)
+    print(f"{'package':<24} {'self (ms)':>10} {'modules':>8}", file=file)
+    for name, seconds, count in packages[:TOP_PACKAGES]:
+        print(f"{name:<24} {seconds * 1e3:>10.1f} {count:>8}", file=file)
+    rest = packages[TOP_PACKAGES:]
+    if rest:
+        print(f"{f'({len(rest)} more)':<24} {sum(p[1] for p in rest) * 1e3:>10.1f} {sum(p[2] for p in rest):>8}", file=file)
+
+    age = process_age()
+    offset = age - (time.perf_counter() - _started) if age is not None else None
+    for milestone, at in _milestones:
+        line = f"{milestone}: {(at - _started) * 1e3:.0f} ms after the first import"
+        if offset is not None:
+            line += f", {(at - _started + offset) * 1e3:.0f} ms after process start"
+        print(line, file=file)
+    print(file=file)
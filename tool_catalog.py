@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+TOOLS_LIST_CHANGED = "notifications/tools/list_changed"
+
+
+def canonical_json(value: Any) -> Any:
+    """Copy of a JSON value with dict keys sorted recursively, so it always serializes identically"""
+    if isinstance(value, dict):
+        return {key: canonical_json(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [canonical_json(item) for item in value]
+    return value
+
+
+def to_openai_tool(tool: Any) -> Dict[str, Any]:
+    """Convert an MCP tool definition to an OpenAI function tool"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": canonical_json(tool.inputSchema)
+        }
+    }
+
+
+class ToolCatalog:
+    """Cached, pre-converted OpenAI tool list for one MCP connection.
+
+    The catalog is fetched once (normally at connect time) and served from
+    memory afterwards. It is refetched only after the server sends
+    ``notifications/tools/list_changed`` or, when ``ttl_seconds`` is set,
+    once that much time has passed since the last fetch.
+
+    The OpenAI tools are sorted by name with canonical schemas, so the tools
+    block of every request is byte-identical across turns and sessions and
+    the provider's prompt prefix cache can hit.
+
+    Args:
+        list_tools: Coroutine function returning the server's tools, either a
+            ``ListToolsResult`` (mcp ClientSession) or a plain list (fastmcp Client)
+        ttl_seconds: Maximum age of the catalog, or None to rely on notifications only
+    """
+
+    def __init__(self, list_tools: Callable[[], Awaitable[Any]], ttl_seconds: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._list_tools = list_tools
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._fetched_at: Optional[float] = None
+        self.tools: List[Any] = []
+        self._tools_by_name: Dict[str, Any] = {}
+        self.openai_tools: List[Dict[str, Any]] = []
+        self.refreshes = 0
+
+    @property
+    def names(self) -> List[str]:
+        return [tool.name for tool in self.tools]
+
+    def tool(self, name: str) -> Optional[Any]:
+        """MCP tool definition by name (for its annotations), or None if unknown"""
+        return self._tools_by_name.get(name)
+
+    def is_stale(self) -> bool:
+        if self._fetched_at is None:
+            return True
+        return self.ttl_seconds is not None and self._clock() - self._fetched_at >= self.ttl_seconds
+
+    def invalidate(self) -> None:
+        self._fetched_at = None
+
+    async def _fetch(self) -> None:
+        response = await self._list_tools()
+        self.tools = list(getattr(response, 'tools', response))
+        self._tools_by_name = {tool.name: tool for tool in self.tools}
+        self.openai_tools = [to_openai_tool(tool) for tool in sorted(self.tools, key=lambda tool: tool.name)]
+        self._fetched_at = self._clock()
+        self.refreshes += 1
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """Fetch the tool list from the server and rebuild the OpenAI tools"""
+        async with self._lock:
+            await self._fetch()
+        return self.openai_tools
+
+    async def get(self) -> List[Dict[str, Any]]:
+        """OpenAI tools for the next LLM call, refetched only when stale"""
+        if self.is_stale():
+            # Concurrent queries share a single refetch
+            async with self._lock:
+                if self.is_stale():
+                    await self._fetch()
+        return self.openai_tools
+
+    async def handle_message(self, message: Any) -> None:
+        """Message handler for ClientSession / fastmcp Client that watches for tool list changes"""
+        notification = getattr(message, 'root', message)
+        if getattr(notification, 'method', None) == TOOLS_LIST_CHANGED:
+            self.invalidate()
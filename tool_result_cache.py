@@ -0,0 +1,111 @@
+import os
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Cache defaults; each can be overridden with the matching environment variable
+DEFAULT_TTL_SECONDS = 300.0   # TOOL_RESULT_CACHE_TTL, for tools hinted read-only and idempotent
+DEFAULT_MAX_ENTRIES = 1024    # TOOL_RESULT_CACHE_SIZE
+
+
+def parse_tool_ttls(spec: str) -> Dict[str, float]:
+    """Parse per-tool TTLs such as "get_weather_alerts=60,create_appointment=0" """
+    ttls = {}
+    for item in spec.split(','):
+        if item.strip():
+            name, _, seconds = item.partition('=')
+            ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+def cache_key(tool_name: str, tool_args: Any) -> str:
+    """Tool name plus canonical JSON of the arguments, so key order and spacing don't matter"""
+    return tool_name + ':' + json.dumps(tool_args, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+class ToolResultCache:
+    """Size-bounded TTL cache of MCP tool results shared by all queries of a client.
+
+    A tool is cached when its TTL is positive. Configured TTLs win; otherwise
+    tools whose annotations carry both ``readOnlyHint`` and ``idempotentHint``
+    get ``default_ttl`` and all other tools are never cached. Read-only alone
+    only means the call has no side effects, not that its result stays the
+    same, so such tools are cached only through ``ttls``. Results are stored
+    exactly as the server returned them (before redaction), so callers must
+    not mutate a cached result's content.
+
+    Args:
+        default_ttl: TTL in seconds for tools hinted read-only and idempotent
+        ttls: Per-tool TTLs in seconds overriding the annotations, 0 disables caching
+        max_entries: Maximum number of cached results, least recently used evicted first
+    """
+
+    def __init__(self, default_ttl: Optional[float] = None, ttls: Optional[Dict[str, float]] = None,
+                 max_entries: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        if default_ttl is None:
+            default_ttl = float(os.getenv("TOOL_RESULT_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        if ttls is None:
+            ttls = parse_tool_ttls(os.getenv("TOOL_RESULT_CACHE_TTLS", ""))
+        if max_entries is None:
+            max_entries = int(os.getenv("TOOL_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self.default_ttl = default_ttl
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self._clock = clock
+        # key -> (expires_at, result), in least recently used order
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, tool_name: str, tool: Any = None) -> float:
+        """TTL of a tool's results in seconds, 0 when they must not be cached"""
+        if tool_name in self.ttls:
+            return self.ttls[tool_name]
+        annotations = getattr(tool, 'annotations', None)
+        if annotations is not None and (getattr(annotations, 'readOnlyHint', None)
+                                        and getattr(annotations, 'idempotentHint', None)):
+            return self.default_ttl
+        return 0.0
+
+    def get(self, tool_name: str, tool_args: Any) -> Optional[Any]:
+        """Cached result of an identical call, or None"""
+        key = cache_key(tool_name, tool_args)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if self._clock() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, tool_name: str, tool_args: Any, result: Any, tool: Any = None) -> bool:
+        """Store a successful result if the tool is cacheable; returns whether it was stored"""
+        ttl = self.ttl_for(tool_name, tool)
+        if ttl <= 0 or self.max_entries <= 0 or getattr(result, 'isError', False) or getattr(result, 'is_error', False):
+            return False
+        key = cache_key(tool_name, tool_args)
+        self._entries[key] = (self._clock() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)